@@ -0,0 +1,305 @@
+import sys
+import json
+import math
+import time
+import argparse
+import warnings
+import platform
+import tracemalloc
+import numpy as np
+import fresnel_diffraction as fd
+
+def Intensity_from_integral(k,z,Integral):
+    """This function converts the complex aperture integrals into intensities with the constants used throughout fresnel_diffraction"""
+    return 8.85E-12*3E8*(abs((k/(2*np.pi*z))*Integral))**2
+
+def Run_Intensity_function_1D(k,xvals,z,x1,x2,N):
+    return np.array([fd.Intensity_function_1D(k,x,z,x1,x2,N) for x in xvals]),len(xvals)*(N+1)
+
+def Run_Intensity_function_x_2D(k,xvals,z,x1,x2,N):
+    return Intensity_from_integral(k,z,np.array([fd.Intensity_function_x_2D(k,x,z,x1,x2,N) for x in xvals])),len(xvals)*(N+1)
+
+def Run_Intensity_function_x_2D_Trapezoid(k,xvals,z,x1,x2,N):
+    return Intensity_from_integral(k,z,np.array([fd.Intensity_function_x_2D_Trapezoid(k,x,z,x1,x2,N) for x in xvals])),len(xvals)*(N+1)
+
+def Run_Intensity_function_1D_batch(k,xvals,z,x1,x2,N):
+    return fd.Intensity_function_1D_batch(k,xvals,z,x1,x2,N),len(xvals)*(N+1)
+
+def Run_Field_vector_2D_simps(k,xvals,z,x1,x2,N):
+    return Intensity_from_integral(k,z,fd.Field_vector_2D(k,xvals,z,x1,x2,N,fd.simps)),len(xvals)*(N+1)
+
+def Run_Field_vector_2D_trapz(k,xvals,z,x1,x2,N):
+    return Intensity_from_integral(k,z,fd.Field_vector_2D(k,xvals,z,x1,x2,N,fd.trapz)),len(xvals)*(N+1)
+
+def Run_Field_vector_2D_Analytic(k,xvals,z,x1,x2,N):
+    return Intensity_from_integral(k,z,fd.Field_vector_2D_Analytic(k,xvals,z,x1,x2)),2*len(xvals) #two Fresnel integral evaluations per screen coordinate
+
+def Run_Field_vector_2D_Adaptive(k,xvals,z,x1,x2,N):
+    Integral,Evaluations,Error=fd.Field_vector_2D_Adaptive(k,xvals,z,x1,x2)
+    return Intensity_from_integral(k,z,Integral),int(Evaluations.sum())
+
+Integrators={
+    "Intensity_function_1D":Run_Intensity_function_1D,
+    "Intensity_function_x_2D":Run_Intensity_function_x_2D,
+    "Intensity_function_x_2D_Trapezoid":Run_Intensity_function_x_2D_Trapezoid,
+    "Intensity_function_1D_batch":Run_Intensity_function_1D_batch,
+    "Field_vector_2D_simps":Run_Field_vector_2D_simps,
+    "Field_vector_2D_trapz":Run_Field_vector_2D_trapz,
+    "Field_vector_2D_Analytic":Run_Field_vector_2D_Analytic,
+    "Field_vector_2D_Adaptive":Run_Field_vector_2D_Adaptive,
+} #each returns the intensities at xvals and the number of integrand evaluations used
+Closed_form_integrators=("Field_vector_2D_Analytic",) #exact for the slit, reported apart from the numerical integrators
+Reference_tolerance=1E-10 #largest relative difference allowed between the analytic reference and a tight Romberg integration
+Per_point_integrators=("Intensity_function_1D","Intensity_function_x_2D","Intensity_function_x_2D_Trapezoid") #python loops over screen coordinates, skipped beyond Max_loop_evaluations
+Max_loop_evaluations=2*10**6
+
+def Measure(name,k,xvals,z,x1,x2,N,Reference,repeats):
+    """This function runs one integrator, returning its best wall time of repeats runs, peak memory allocated
+    during a separate traced run, integrand evaluations and maximum error relative to the peak of Reference"""
+    Integrator=Integrators[name]
+    Best=float("inf")
+    for repeat in range(repeats):
+        start=time.perf_counter()
+        Intensity,Evaluations=Integrator(k,xvals,z,x1,x2,N)
+        Best=min(Best,time.perf_counter()-start)
+    tracemalloc.start()
+    Integrator(k,xvals,z,x1,x2,N)
+    Peak=tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"integrator":name,"time":Best,"peak_bytes":Peak,"evaluations":Evaluations,
+            "evaluations_per_second":Evaluations/Best if Best>0 else float("inf"),
+            "max_error":float(np.max(abs(Intensity-Reference))/np.max(Reference))}
+
+def Run_suite(N_values,NumPoints_values,Fresnel_numbers,names,wavelength=500E-9,half_width=1E-4,repeats=3):
+    """This function sweeps every integrator in names over the intervals N_values, the screen resolutions
+    NumPoints_values and the Fresnel numbers half_width**2/(wavelength*z) of a slit of the given half width, with the
+    screen spanning three slit widths. Errors are measured against Intensity_function_1D_Analytic"""
+    k=(2*math.pi)/wavelength
+    x1,x2=-half_width,half_width
+    Results=[]
+    for Fresnel_number in Fresnel_numbers:
+        z=half_width**2/(wavelength*Fresnel_number)
+        for NumPoints in NumPoints_values:
+            xvals=np.linspace(-3*half_width,3*half_width,NumPoints)
+            Reference=fd.Intensity_function_1D_Analytic(k,xvals,z,x1,x2)
+            for N in N_values:
+                for name in names:
+                    if name in ("Field_vector_2D_Analytic","Field_vector_2D_Adaptive") and N!=N_values[0]:
+                        continue #these do not use N so are run once
+                    if name in Per_point_integrators and NumPoints*(N+1)>Max_loop_evaluations:
+                        continue
+                    Result=Measure(name,k,xvals,z,x1,x2,N,Reference,repeats)
+                    Result.update({"N":N,"NumPoints":NumPoints,"fresnel_number":Fresnel_number,"z":z})
+                    Results.append(Result)
+                    print("%-34s N=%-6d points=%-5d NF=%-6g %10.5f s %12.3g evals/s error %.2e" % (name,N,NumPoints,Fresnel_number,Result["time"],Result["evaluations_per_second"],Result["max_error"]))
+    return Results
+
+def Check_reference(Fresnel_numbers,NumPoints=1000,wavelength=500E-9,half_width=1E-4,tolerance=Reference_tolerance):
+    """This function checks once per Fresnel number that the analytic reference of Run_suite agrees with
+    Field_vector_2D_Adaptive refined to a relative tolerance of 1E-13, an independent calculation of the same
+    integral. Each case passes if the maximum difference relative to the peak is within tolerance"""
+    k=(2*math.pi)/wavelength
+    xvals=np.linspace(-3*half_width,3*half_width,NumPoints)
+    Results=[]
+    for Fresnel_number in Fresnel_numbers:
+        z=half_width**2/(wavelength*Fresnel_number)
+        Reference=fd.Intensity_function_1D_Analytic(k,xvals,z,-half_width,half_width)
+        Integral=fd.Field_vector_2D_Adaptive(k,xvals,z,-half_width,half_width,abs_tol=2E-13*half_width,rel_tol=1E-13,max_level=24)[0]
+        Error=float(np.max(abs(Intensity_from_integral(k,z,Integral)-Reference))/np.max(Reference))
+        Passed=Error<=tolerance
+        Results.append({"fresnel_number":Fresnel_number,"max_error":Error,"tolerance":tolerance,"passed":Passed})
+        print("Reference NF=%-6g analytic against Romberg: difference %.2e (tolerance %g) %s" % (Fresnel_number,Error,tolerance,"ok" if Passed else "FAILED"))
+    return Results
+
+Equivalence_tolerance=1E-12 #largest difference, relative to the peak, allowed between a vectorised kernel and the per pixel loop it replaces
+
+def Check_separable_map(N_values=(100,101),NumPoints=20,wavelength=500E-9,x1=-1E-4,x2=1E-4,y1=-5E-5,y2=5E-5,z=0.05,tolerance=Equivalence_tolerance):
+    """This function checks that fd.Intensity_map_2D gives the same map as the per pixel double loop over
+    Intensity_function_x_2D*Intensity_function_y_2D (and their _Trapezoid versions) that it replaces, for the simps
+    and trapz rules and every N in N_values (even and odd) on a NumPoints by NumPoints screen spanning three
+    aperture widths. Each case passes if the maximum difference relative to the peak is within tolerance"""
+    k=(2*math.pi)/wavelength
+    xvals=np.linspace(3*x1,3*x2,NumPoints)
+    yvals=np.linspace(3*y1,3*y2,NumPoints)
+    Loops={"simps":(fd.Intensity_function_x_2D,fd.Intensity_function_y_2D),"trapz":(fd.Intensity_function_x_2D_Trapezoid,fd.Intensity_function_y_2D_Trapezoid)}
+    Results=[]
+    for rule,(Function_x,Function_y) in Loops.items():
+        for N in N_values:
+            Loop=np.zeros((NumPoints,NumPoints))
+            for i in range(NumPoints):
+                for j in range(NumPoints):
+                    Loop[i,j]=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Function_x(k,xvals[i],z,x1,x2,N)*Function_y(k,yvals[j],z,y1,y2,N)))**2
+            Map=fd.Intensity_map_2D(k,xvals,yvals,z,x1,x2,y1,y2,N,getattr(fd,rule))
+            Error=float(np.max(abs(Map-Loop))/np.max(Loop))
+            Passed=Error<=tolerance
+            Results.append({"check":"Intensity_map_2D","rule":rule,"N":N,"max_error":Error,"tolerance":tolerance,"passed":Passed})
+            print("Intensity_map_2D against per pixel loop, %s N=%-5d difference %.2e (tolerance %g) %s" % (rule,N,Error,tolerance,"ok" if Passed else "FAILED"))
+    return Results
+
+def Check_batch_kernel(N_values=(100,101),NumPoints=200,wavelength=500E-9,x1=-1E-4,x2=1E-4,z=0.05,tolerance=Equivalence_tolerance):
+    """This function checks that fd.Intensity_function_1D_batch gives the same intensities as calling
+    Intensity_function_1D once per screen coordinate, for every N in N_values (even and odd) on NumPoints screen
+    coordinates spanning three aperture widths. Each case passes if the maximum difference relative to the peak is
+    within tolerance"""
+    k=(2*math.pi)/wavelength
+    xvals=np.linspace(3*x1,3*x2,NumPoints)
+    Results=[]
+    for N in N_values:
+        Loop=np.array([fd.Intensity_function_1D(k,x,z,x1,x2,N) for x in xvals])
+        Batch=fd.Intensity_function_1D_batch(k,xvals,z,x1,x2,N)
+        Error=float(np.max(abs(Batch-Loop))/np.max(Loop))
+        Passed=Error<=tolerance
+        Results.append({"check":"Intensity_function_1D_batch","rule":"simpson","N":N,"max_error":Error,"tolerance":tolerance,"passed":Passed})
+        print("Intensity_function_1D_batch against per point loop, N=%-5d difference %.2e (tolerance %g) %s" % (N,Error,tolerance,"ok" if Passed else "FAILED"))
+    return Results
+
+FFT_cases=((0.05,"single",1E-3),(0.002,"transfer",5E-2)) #screen distance, method auto should choose and maximum relative error
+
+def Check_FFT_propagator(M=1024,dx=2E-6,wavelength=500E-9,x1=-1E-4,x2=1E-4,y1=-5E-5,y2=5E-5,N=4000,cases=FFT_cases):
+    """This function propagates a rectangle mask built with Aperture_grid and Rectangular_aperture_mask using
+    Fresnel_propagate_FFT(method="auto") for each case of cases, and compares the intensity within three aperture
+    half widths of the axis with Intensity_map_2D (Simpson, N intervals). The sampled mask covers half a sample
+    beyond each edge, so the reference aperture is widened by dx/2 to match. Each case passes if auto chose the
+    expected method without an aliasing warning and the maximum error relative to the peak is within tolerance"""
+    k=(2*math.pi)/wavelength
+    X,Y=fd.Aperture_grid(M,M,dx)
+    Aperture=fd.Rectangular_aperture_mask(X,Y,x1,x2,y1,y2)
+    Results=[]
+    for z,Method,Tolerance in cases:
+        with warnings.catch_warnings(record=True) as Caught:
+            warnings.simplefilter("always")
+            start=time.perf_counter()
+            E,xvals,yvals=fd.Fresnel_propagate_FFT(Aperture,dx,k,z)
+            Seconds=time.perf_counter()-start
+        Chosen="transfer" if np.isclose(xvals[1]-xvals[0],dx) else "single" #the transfer function keeps the spacing dx
+        ix=np.abs(xvals)<=3*max(abs(x1),abs(x2))
+        iy=np.abs(yvals)<=3*max(abs(x1),abs(x2))
+        Reference=fd.Intensity_map_2D(k,xvals[ix],yvals[iy],z,x1-dx/2,x2+dx/2,y1-dx/2,y2+dx/2,N)
+        Intensity=8.85E-12*3E8*abs(E[np.ix_(ix,iy)])**2
+        Error=float(np.max(abs(Intensity-Reference))/np.max(Reference))
+        Passed=Chosen==Method and not Caught and Error<=Tolerance
+        Results.append({"z":z,"expected_method":Method,"method":Chosen,"warnings":len(Caught),"time":Seconds,"max_error":Error,"tolerance":Tolerance,"passed":Passed})
+        print("FFT %-8s z=%-6g M=%d dx=%g: %10.5f s error %.2e (tolerance %g) %s" % (Chosen,z,M,dx,Seconds,Error,Tolerance,"ok" if Passed else "FAILED"))
+    return Results
+
+def Parallel_scaling(worker_counts=(1,2,4,8),executor="thread",NumPoints=2000,N=200,wavelength=500E-9,half_width=1E-4,z=0.05,repeats=3):
+    """This function times fd.Intensity_map_2D_parallel on a NumPoints by NumPoints screen spanning twice a square
+    aperture of the given half width for each worker count, returning the best time of repeats runs and the speedup
+    over the first worker count. A case fails if its map is not identical to that of the first worker count"""
+    k=(2*math.pi)/wavelength
+    x1,x2=-half_width,half_width
+    xvals=np.linspace(2*x1,2*x2,NumPoints)
+    Results=[]
+    Reference=None
+    for workers in worker_counts:
+        Best=float("inf")
+        for repeat in range(repeats):
+            start=time.perf_counter()
+            zvals=fd.Intensity_map_2D_parallel(k,xvals,xvals,z,x1,x2,x1,x2,N,fd.simps,workers=workers,executor=executor)
+            Best=min(Best,time.perf_counter()-start)
+        if Reference is None:
+            Reference=zvals
+            Base=Best
+        Passed=bool(np.array_equal(zvals,Reference))
+        Results.append({"workers":workers,"executor":executor,"NumPoints":NumPoints,"N":N,"time":Best,"speedup":Base/Best,"passed":Passed})
+        print("Parallel %-7s workers=%-3d points=%-5d N=%-6d %10.5f s speedup %5.2f %s" % (executor,workers,NumPoints,N,Best,Base/Best,"ok" if Passed else "FAILED, map differs from %d workers" % worker_counts[0]))
+    return Results
+
+def Record_key(Result):
+    return (Result["integrator"],Result["N"],Result["NumPoints"],Result["fresnel_number"])
+
+def Check_baseline(Results,Baseline):
+    """This function compares Results with a baseline written by --write-baseline, returning a description of every
+    case slower than time_factor times (plus min_time) or less accurate than error_factor times its baseline"""
+    Reference={Record_key(Result):Result for Result in Baseline["results"]}
+    Regressions=[]
+    for Result in Results:
+        Base=Reference.get(Record_key(Result))
+        if Base is None:
+            continue
+        if Result["time"]>Baseline["time_factor"]*Base["time"]+Baseline["min_time"]:
+            Regressions.append("%s N=%d points=%d NF=%g: time %.4g s exceeds baseline %.4g s" % (Record_key(Result)+(Result["time"],Base["time"])))
+        if Result["max_error"]>Baseline["error_factor"]*Base["max_error"]+Baseline["min_error"]:
+            Regressions.append("%s N=%d points=%d NF=%g: error %.3g exceeds baseline %.3g" % (Record_key(Result)+(Result["max_error"],Base["max_error"])))
+    return Regressions
+
+def Cheapest_methods(Results,accuracy):
+    """This function returns, for each screen resolution and Fresnel number, the fastest numerical integrator and N
+    whose error is within accuracy. The closed form integrators are left out, as they only apply to a slit"""
+    Best={}
+    for Result in Results:
+        if Result["integrator"] in Closed_form_integrators or Result["max_error"]>accuracy:
+            continue
+        case=(Result["NumPoints"],Result["fresnel_number"])
+        if case not in Best or Result["time"]<Best[case]["time"]:
+            Best[case]=Result
+    return Best
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description="Time and accuracy benchmark of the fresnel_diffraction integrators")
+    parser.add_argument("--N",type=int,nargs="+",default=[100,1000,10000],help="integration intervals to sweep")
+    parser.add_argument("--points",type=int,nargs="+",default=[100,1000],help="screen resolutions to sweep")
+    parser.add_argument("--fresnel",type=float,nargs="+",default=[0.1,1.0,10.0],help="Fresnel numbers to sweep")
+    parser.add_argument("--integrators",nargs="+",default=list(Integrators),choices=list(Integrators))
+    parser.add_argument("--repeats",type=int,default=3,help="timed runs of each case, the best is kept")
+    parser.add_argument("--output",default="benchmark_results.json",help="JSON file for the results")
+    parser.add_argument("--accuracy",type=float,default=1E-6,help="relative error budget for the cheapest method summary")
+    parser.add_argument("--baseline",help="baseline JSON to check for regressions, exits with status 1 if any are found")
+    parser.add_argument("--write-baseline",help="write the results as a baseline JSON with the thresholds below")
+    parser.add_argument("--time-factor",type=float,default=1.5)
+    parser.add_argument("--error-factor",type=float,default=2.0)
+    parser.add_argument("--parallel-scaling",type=int,nargs="+",metavar="WORKERS",help="also time the parallel 2D renderer with each of these worker counts")
+    parser.add_argument("--parallel-executor",choices=["thread","process"],default="thread")
+    parser.add_argument("--parallel-points",type=int,default=2000,help="screen resolution of the parallel scaling map")
+    parser.add_argument("--skip-equivalence-check",action="store_true",help="skip the comparison of the vectorised kernels with the per pixel loops")
+    parser.add_argument("--skip-fft-check",action="store_true",help="skip the comparison of the FFT propagator with Simpson's rule")
+    args=parser.parse_args(argv)
+
+    Reference_results=Check_reference(args.fresnel)
+    Equivalence_results=[] if args.skip_equivalence_check else Check_separable_map()+Check_batch_kernel()
+    Results=Run_suite(args.N,args.points,args.fresnel,args.integrators,repeats=args.repeats)
+    FFT_results=[] if args.skip_fft_check else Check_FFT_propagator()
+    Parallel_results=Parallel_scaling(args.parallel_scaling,args.parallel_executor,args.parallel_points,repeats=args.repeats) if args.parallel_scaling else []
+    Metadata={"python":platform.python_version(),"numpy":np.__version__,"machine":platform.machine(),"time":time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(args.output,"w") as handle:
+        json.dump({"metadata":Metadata,"results":Results,"reference_check":Reference_results,"equivalence_check":Equivalence_results,"fft_check":FFT_results,"parallel_scaling":Parallel_results},handle,indent=1)
+    print("Results written to %s" % args.output)
+
+    print("\nCheapest numerical method within a relative error of %g:" % args.accuracy)
+    for (NumPoints,Fresnel_number),Result in sorted(Cheapest_methods(Results,args.accuracy).items()):
+        print("points=%-5d NF=%-6g %-34s N=%-6d %10.5f s" % (NumPoints,Fresnel_number,Result["integrator"],Result["N"],Result["time"]))
+    Closed_form=[Result for Result in Results if Result["integrator"] in Closed_form_integrators]
+    if Closed_form:
+        print("\nClosed form, slit only (the reference itself):")
+    for Result in Closed_form:
+        print("points=%-5d NF=%-6g %-34s %10.5f s" % (Result["NumPoints"],Result["fresnel_number"],Result["integrator"],Result["time"]))
+
+    if args.write_baseline:
+        with open(args.write_baseline,"w") as handle:
+            json.dump({"metadata":Metadata,"time_factor":args.time_factor,"error_factor":args.error_factor,"min_time":1E-3,"min_error":1E-12,"results":Results},handle,indent=1)
+        print("Baseline written to %s" % args.write_baseline)
+    Status=0
+    if not all(Result["passed"] for Result in Reference_results):
+        print("Reference check FAILED")
+        Status=1
+    if not all(Result["passed"] for Result in Equivalence_results):
+        print("Equivalence check FAILED")
+        Status=1
+    if not all(Result["passed"] for Result in FFT_results):
+        print("FFT propagator check FAILED")
+        Status=1
+    if not all(Result["passed"] for Result in Parallel_results):
+        print("Parallel scaling check FAILED")
+        Status=1
+    if args.baseline:
+        with open(args.baseline) as handle:
+            Regressions=Check_baseline(Results,json.load(handle))
+        for Regression in Regressions:
+            print("REGRESSION: "+Regression)
+        if Regressions:
+            return 1
+        print("No regressions against %s" % args.baseline)
+    return Status
+
+if __name__=="__main__":
+    sys.exit(main())
@@ -1,8 +1,103 @@
+import os
+import csv
+import mmap
+import json
 import math
+import hashlib
+import time
+import inspect
+import argparse
+import warnings
+import functools
+import threading
+import contextlib
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.integrate import simps
 from scipy.integrate import trapz
+from scipy.special import fresnel
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+class Instrumentation:
+    """This class collects, for each named stage of a run, the number of calls, the time spent, the integrand
+    evaluations, the bytes of integrand and result arrays allocated and the screen pixels produced. Nothing is
+    recorded unless enabled is True, and while it is False stage() and the Instrumented wrapper cost only one
+    attribute check. Times of nested stages are inclusive, e.g. Field_vector_2D includes its simps calls.
+    Stages run in worker processes are not recorded"""
+    Fields=("calls","seconds","evaluations","bytes","pixels")
+
+    def __init__(self):
+        self.enabled=False
+        self.records={}
+        self.lock=threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.records={}
+
+    def record(self,name,seconds=0.0,evaluations=0,bytes=0,pixels=0):
+        with self.lock:
+            Record=self.records.setdefault(name,dict.fromkeys(self.Fields,0))
+            Record["calls"]+=1
+            Record["seconds"]+=seconds
+            Record["evaluations"]+=int(evaluations)
+            Record["bytes"]+=int(bytes)
+            Record["pixels"]+=int(pixels)
+
+    def stage(self,name,evaluations=0,bytes=0,pixels=0):
+        """This method returns a context manager timing the enclosed code as one call of stage name"""
+        if not self.enabled:
+            return No_stage
+        return self.timed_stage(name,evaluations,bytes,pixels)
+
+    @contextlib.contextmanager
+    def timed_stage(self,name,evaluations,bytes,pixels):
+        start=time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name,time.perf_counter()-start,evaluations,bytes,pixels)
+
+    def summary(self):
+        """This method returns the records as a table, slowest stage first, with the evaluation and pixel throughputs"""
+        Lines=["%-36s %9s %11s %11s %13s %12s %11s %12s %12s" % ("Stage","Calls","Total (s)","Mean (ms)","Evaluations","Evals/s","MB","Pixels","Pixels/s")]
+        for name,Record in sorted(self.records.items(),key=lambda item:-item[1]["seconds"]):
+            Seconds=Record["seconds"]
+            Lines.append("%-36s %9d %11.4f %11.4f %13d %12.3g %11.2f %12d %12.3g" % (name,Record["calls"],Seconds,1000*Seconds/Record["calls"],Record["evaluations"],
+                         Record["evaluations"]/Seconds if Seconds>0 else 0,Record["bytes"]/2**20,Record["pixels"],Record["pixels"]/Seconds if Seconds>0 else 0))
+        return "\n".join(Lines)
+
+    def write_json(self,path):
+        """This method writes the records to path as JSON, one object per stage"""
+        with open(path,"w") as handle:
+            json.dump([dict(stage=name,**Record) for name,Record in self.records.items()],handle,indent=1)
+
+No_stage=contextlib.nullcontext() #returned by Instrumentation.stage while disabled
+Profiler=Instrumentation() #the instrumentation shared by every function of this module, enable with Profiler.enabled=True
+
+def Instrumented(name,counts=None):
+    """This function returns a decorator recording each call of the decorated function as one call of stage name
+    when the Profiler is enabled. counts(result,parameters), where parameters maps argument names to values,
+    returns the evaluations, bytes and pixels of the call"""
+    def decorate(function):
+        Signature=inspect.signature(function)
+        @functools.wraps(function)
+        def wrapper(*args,**kwargs):
+            if not Profiler.enabled:
+                return function(*args,**kwargs)
+            start=time.perf_counter()
+            result=function(*args,**kwargs)
+            Seconds=time.perf_counter()-start
+            Counts={}
+            if counts is not None:
+                Bound=Signature.bind(*args,**kwargs)
+                Bound.apply_defaults()
+                Counts=counts(result,Bound.arguments)
+            Profiler.record(name,Seconds,**Counts)
+            return result
+        return wrapper
+    return decorate
 
 def menu_text():
     """This function prints a menu listing the various sections of the program which may be run"""
@@ -14,6 +109,7 @@ def menu_text():
     print ("5. Exit")
     print (67*"-")
 
+@Instrumented("Intensity_function_1D",lambda result,p:{"evaluations":p["N"]+1,"bytes":8*(p["N"]+1),"pixels":1})
 def Intensity_function_1D(k,x,z,x1,x2,N):
     """This function calculates the intensity of light on a screen distance z from an 
     aperture width x1-x2 as a function of position on the screen x through integration
@@ -33,46 +129,955 @@ def Intensity_function_1D(k,x,z,x1,x2,N):
         Intensity=(8.85E-12)*(3E8)*((abs(E))**2) #modulus squared of the E field (same as complex times conjugate) multiplied by set of constants returns Intensity value
     return Intensity
 
+Max_chunk_elements=2**22 #largest number of screen x aperture integrand values held in memory at once (64 MB of complex values)
+
+def Chunk_length(N,chunk_size=None):
+    """This function returns the number of screen coordinates to process at once so that a block of
+    integrand values with N+1 aperture samples per coordinate stays within Max_chunk_elements"""
+    if chunk_size is None:
+        chunk_size=Max_chunk_elements//(N+1)
+    return max(1,int(chunk_size))
+
+@functools.lru_cache(maxsize=32)
+def Aperture_samples(a1,a2,N):
+    """This function returns the read only array of aperture values with N intervals across a1'-a2'. Results are
+    cached so that repeated calculations with the same aperture share one array"""
+    Aperture_vals=np.linspace(a1, a2, N+1)
+    Aperture_vals.flags.writeable=False
+    return Aperture_vals
+
+@functools.lru_cache(maxsize=32)
+def Screen_grid(vmin,vmax,NumPoints):
+    """This function returns the read only array of NumPoints screen coordinates from vmin to vmax, cached
+    in the same way as Aperture_samples"""
+    vals=np.linspace(vmin,vmax,NumPoints)
+    vals.flags.writeable=False
+    return vals
+
+@functools.lru_cache(maxsize=32)
+def Simpson_weights(N,h):
+    """This function returns the read only self built simpsons rule weights h/3*[1,4,2,4,...,2,4,1] for N intervals of step size h"""
+    Weights=np.full(N+1,2.0)
+    Weights[1::2]=4.0 #odd integrand entries multiplied by 4
+    Weights[0]=1.0
+    Weights[N]=1.0 #first and last integrand entries multiplied by 1
+    Weights=(h/3)*Weights
+    Weights.flags.writeable=False
+    return Weights
+
+@Instrumented("Intensity_function_1D_batch",lambda result,p:{"evaluations":len(result)*(p["N"]+1),"bytes":24*len(result)*(p["N"]+1),"pixels":len(result)})
+def Intensity_function_1D_batch(k,xvals,z,x1,x2,N,chunk_size=None):
+    """This function calculates the same intensity as Intensity_function_1D for every screen coordinate
+    in the array xvals in one call. The simpsons weights are built once and the phases of a block of
+    screen coordinates against all aperture values are found by broadcasting. At most chunk_size screen
+    coordinates are processed at once, by default as many as fit in Max_chunk_elements"""
+    xvals=np.asarray(xvals,dtype=float)
+    Aperture_vals=Aperture_samples(x1,x2,N) #array of aperture values with N intervals across the user defined limits
+    Weights=Simpson_weights(N,(x2-x1)/N)
+    Chunk=Chunk_length(N,chunk_size)
+    Intensity=np.empty(xvals.shape)
+    for start in range(0,len(xvals),Chunk): #cycles through blocks of screen coordinates
+        Phase=(k/(2*z))*((xvals[start:start+Chunk,np.newaxis]-Aperture_vals[np.newaxis,:])**2) #phase for each screen coordinate (row) and aperture value (column)
+        E=(np.cos(Phase)@Weights+1j*(np.sin(Phase)@Weights))*(k/(2*math.pi*z)) #weighted sums give the simpsons integration, then multiplied by constants to give the E field
+        Intensity[start:start+Chunk]=(8.85E-12)*(3E8)*((abs(E))**2)
+    return Intensity
+
+@Instrumented("Intensity_function_x_2D",lambda result,p:{"pixels":1})
 def Intensity_function_x_2D(k,x,z,x1,x2,N):
     """This function performs an inbuilt simpsons rule integration across the aperture width x1'-x2'
     for each coordinate x of the screen"""
     Aperture_vals=np.linspace(x1, x2, N+1) #sets up array of aperture values with N intervals across the user defined limits
-    Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
-    for i in range(N+1):
-        Integrand[i]=np.exp(1j*(k/(2*z))*((x-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
-    Integral=simps(Integrand,Aperture_vals) #performs the simpsons integration with the aperture and integrand arrays
+    with Profiler.stage("integrand allocation",bytes=16*(N+1)):
+        Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
+    with Profiler.stage("integrand evaluation",evaluations=N+1):
+        for i in range(N+1):
+            Integrand[i]=np.exp(1j*(k/(2*z))*((x-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
+    with Profiler.stage("simps"):
+        Integral=simps(Integrand,Aperture_vals) #performs the simpsons integration with the aperture and integrand arrays
     return Integral
 
+@Instrumented("Intensity_function_y_2D",lambda result,p:{"pixels":1})
 def Intensity_function_y_2D(k,y,z,y1,y2,N):
     """This function performs an inbuilt simpsons rule integration across the aperture width y1'-y2'
     for each coordinate y of the screen"""
     Aperture_vals=np.linspace(y1, y2, N+1) #sets up array of aperture values with N intervals across the user defined limits
-    Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
-    for i in range(N+1):
-        Integrand[i]=np.exp(1j*(k/(2*z))*((y-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
-    Integral=simps(Integrand,Aperture_vals) #performs the simpsons integration with the aperture and integrand arrays
+    with Profiler.stage("integrand allocation",bytes=16*(N+1)):
+        Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
+    with Profiler.stage("integrand evaluation",evaluations=N+1):
+        for i in range(N+1):
+            Integrand[i]=np.exp(1j*(k/(2*z))*((y-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
+    with Profiler.stage("simps"):
+        Integral=simps(Integrand,Aperture_vals) #performs the simpsons integration with the aperture and integrand arrays
     return Integral
 
+@Instrumented("Intensity_function_x_2D_Trapezoid",lambda result,p:{"pixels":1})
 def Intensity_function_x_2D_Trapezoid(k,x,z,x1,x2,N):
     """This function performs an inbuilt trapezoid rule integration across the aperture width x1'-x2'
     for each coordinate x of the screen"""
     Aperture_vals=np.linspace(x1, x2, N+1) #sets up array of aperture values with N intervals across the user defined limits
-    Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
-    for i in range(N+1):
-        Integrand[i]=np.exp(1j*(k/(2*z))*((x-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
-    Integral=trapz(Integrand,Aperture_vals) #performs the trapezoid integration with the aperture and integrand arrays
+    with Profiler.stage("integrand allocation",bytes=16*(N+1)):
+        Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
+    with Profiler.stage("integrand evaluation",evaluations=N+1):
+        for i in range(N+1):
+            Integrand[i]=np.exp(1j*(k/(2*z))*((x-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
+    with Profiler.stage("trapz"):
+        Integral=trapz(Integrand,Aperture_vals) #performs the trapezoid integration with the aperture and integrand arrays
     return Integral
 
+@Instrumented("Intensity_function_y_2D_Trapezoid",lambda result,p:{"pixels":1})
 def Intensity_function_y_2D_Trapezoid(k,y,z,y1,y2,N):
     """This function performs an inbuilt trapezoid rule integration across the aperture width y1'-y2'
     for each coordinate y of the screen"""
     Aperture_vals=np.linspace(y1, y2, N+1) #sets up array of aperture values with N intervals across the user defined limits
-    Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
-    for i in range(N+1):
-        Integrand[i]=np.exp(1j*(k/(2*z))*((y-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
-    Integral=trapz(Integrand,Aperture_vals) #performs the trapezoid integration with the aperture and integrand arrays
+    with Profiler.stage("integrand allocation",bytes=16*(N+1)):
+        Integrand=np.zeros(N+1,dtype=complex) #initiates complex array to accept values of the integrand (which are complex numbers)
+    with Profiler.stage("integrand evaluation",evaluations=N+1):
+        for i in range(N+1):
+            Integrand[i]=np.exp(1j*(k/(2*z))*((y-Aperture_vals[i])**2)) #calculates value of the integrand due to each aperture coordinate
+    with Profiler.stage("trapz"):
+        Integral=trapz(Integrand,Aperture_vals) #performs the trapezoid integration with the aperture and integrand arrays
     return Integral
 
+@Instrumented("Field_vector_2D_Analytic",lambda result,p:{"evaluations":2*len(result),"bytes":16*len(result)})
+def Field_vector_2D_Analytic(k,vals,z,a1,a2):
+    """This function evaluates the integral across the aperture width a1'-a2' exactly for every screen coordinate
+    in the array vals using the Fresnel integrals C and S. Substituting u=sqrt(k/(pi*z))*(a'-x) turns the
+    integrand into cos(pi*u**2/2)+i*sin(pi*u**2/2), so no aperture sampling is needed"""
+    vals=np.asarray(vals,dtype=float)
+    Scale=math.sqrt(k/(math.pi*z))
+    S1,C1=fresnel(Scale*(a1-vals))
+    S2,C2=fresnel(Scale*(a2-vals)) #fresnel returns S before C
+    return ((C2-C1)+1j*(S2-S1))/Scale
+
+def Intensity_function_1D_Analytic(k,xvals,z,x1,x2):
+    """This function calculates the exact intensity that Intensity_function_1D approximates for every screen
+    coordinate in the array xvals, for use as a reference when measuring quadrature error"""
+    E=Field_vector_2D_Analytic(k,xvals,z,x1,x2)*(k/(2*math.pi*z))
+    return (8.85E-12)*(3E8)*((abs(E))**2)
+
+@Instrumented("Field_vector_2D_Adaptive",lambda result,p:{"evaluations":result[1].sum(),"bytes":16*len(result[0])*(p["max_level"]+2)})
+def Field_vector_2D_Adaptive(k,vals,z,a1,a2,abs_tol=0.0,rel_tol=1E-6,max_level=20,min_level=4):
+    """This function integrates across the aperture width a1'-a2' for every screen coordinate in the array vals
+    by Romberg refinement, halving the step size until the change in the extrapolated integral is within
+    max(abs_tol,rel_tol*abs(integral)). Each halving reuses all earlier samples, so only the new midpoints are
+    evaluated, and refinement stops separately for each screen coordinate. Returns the complex integrals, the
+    number of integrand evaluations and the error estimate for each screen coordinate. Coordinates not
+    converged after 2**max_level intervals keep their last estimate and a warning is given"""
+    vals=np.asarray(vals,dtype=float)
+    Width=a2-a1
+    Trapezoid=(Width/2)*(np.exp(1j*(k/(2*z))*((vals-a1)**2))+np.exp(1j*(k/(2*z))*((vals-a2)**2))) #single interval trapezoid estimate
+    Romberg=np.zeros((len(vals),max_level+1),dtype=complex) #latest row of the Romberg table for each screen coordinate
+    Romberg[:,0]=Trapezoid
+    Integral=Trapezoid.copy()
+    Error=np.full(vals.shape,np.inf)
+    Evaluations=np.full(vals.shape,2)
+    Active=np.ones(vals.shape,dtype=bool) #screen coordinates still being refined
+    for n in range(1,max_level+1):
+        Index=np.nonzero(Active)[0]
+        if len(Index)==0:
+            break
+        Step=Width/2**n
+        New_points=a1+Step*np.arange(1,2**n,2) #midpoints of the previous intervals, the only new samples needed
+        Block=max(1,Max_chunk_elements//len(Index))
+        Sum=np.zeros(len(Index),dtype=complex)
+        for start in range(0,len(New_points),Block):
+            Sum+=np.exp(1j*(k/(2*z))*((vals[Index,np.newaxis]-New_points[np.newaxis,start:start+Block])**2)).sum(axis=1)
+        Row=np.empty((len(Index),n+1),dtype=complex)
+        Row[:,0]=Romberg[Index,0]/2+Step*Sum #trapezoid estimate with 2**n intervals
+        for m in range(1,n+1):
+            Row[:,m]=Row[:,m-1]+(Row[:,m-1]-Romberg[Index,m-1])/(4**m-1) #Richardson extrapolation
+        Error[Index]=abs(Row[:,n]-Romberg[Index,n-1])
+        Integral[Index]=Row[:,n]
+        Romberg[Index,:n+1]=Row
+        Evaluations[Index]=2**n+1
+        if n>=min_level:
+            Active[Index[Error[Index]<=np.maximum(abs_tol,rel_tol*abs(Row[:,n]))]]=False
+    if Active.any():
+        warnings.warn("%d screen coordinates did not reach the requested tolerance in %d Romberg levels" % (Active.sum(),max_level))
+    return Integral,Evaluations,Error
+
+def Intensity_function_1D_Adaptive(k,xvals,z,x1,x2,abs_tol=0.0,rel_tol=1E-6,max_level=20):
+    """This function calculates the intensity of Intensity_function_1D for every screen coordinate in the array
+    xvals with the Romberg refinement of Field_vector_2D_Adaptive. Returns the intensities, the number of integrand
+    evaluations and the error estimate of each intensity"""
+    Integral,Evaluations,Error=Field_vector_2D_Adaptive(k,xvals,z,x1,x2,abs_tol,rel_tol,max_level)
+    E=abs(Integral)*(k/(2*math.pi*z))
+    dE=Error*(k/(2*math.pi*z)) #error in the modulus of the E field
+    return (8.85E-12)*(3E8)*E**2,Evaluations,(8.85E-12)*(3E8)*(2*E*dE+dE**2)
+
+def Intensity_map_2D_Adaptive(k,xvals,yvals,z,x1,x2,y1,y2,abs_tol=0.0,rel_tol=1E-6,max_level=20):
+    """This function calculates the intensity map of Intensity_map_2D with the x and y integrals found by the
+    Romberg refinement of Field_vector_2D_Adaptive. Returns the intensity map, the number of integrand evaluations
+    used for each screen coordinate pair and the error estimate of each intensity"""
+    Field_x,Evaluations_x,Error_x=Field_vector_2D_Adaptive(k,xvals,z,x1,x2,abs_tol,rel_tol,max_level)
+    Field_y,Evaluations_y,Error_y=Field_vector_2D_Adaptive(k,yvals,z,y1,y2,abs_tol,rel_tol,max_level)
+    E=(k/(2*math.pi*z))*abs(np.outer(Field_x,Field_y))
+    dE=(k/(2*math.pi*z))*(np.outer(abs(Field_x),Error_y)+np.outer(Error_x,abs(Field_y))+np.outer(Error_x,Error_y)) #error in the modulus of the product
+    Evaluations=Evaluations_x[:,np.newaxis]+Evaluations_y[np.newaxis,:]
+    return 8.85E-12*3E8*E**2,Evaluations,8.85E-12*3E8*(2*E*dE+dE**2)
+
+class Adaptive_rule:
+    """This class holds the tolerances of the Romberg refinement of Field_vector_2D_Adaptive, so that it can be
+    passed as the rule of Field_vector_2D and every function built on it (including worker processes)"""
+
+    def __init__(self,abs_tol=0.0,rel_tol=1E-6,max_level=20):
+        self.abs_tol=abs_tol
+        self.rel_tol=rel_tol
+        self.max_level=max_level
+
+    def __repr__(self):
+        return "Adaptive_rule(abs_tol=%r, rel_tol=%r, max_level=%r)" % (self.abs_tol,self.rel_tol,self.max_level)
+
+@Instrumented("Field_vector_2D")
+def Field_vector_2D(k,vals,z,a1,a2,N,rule=simps,chunk_size=None):
+    """This function performs the integration across the aperture width a1'-a2' for every screen
+    coordinate in the array vals at once, returning the array of complex integrals. The integration
+    rule may be any function with the signature of simps or trapz, i.e. rule(y,x,axis=-1), "analytic"
+    to use the closed form of Field_vector_2D_Analytic, or "adaptive" or an Adaptive_rule to use the Romberg
+    refinement of Field_vector_2D_Adaptive with the default or the given tolerances (N is then unused).
+    At most chunk_size screen coordinates are integrated at once, by default as many as fit in Max_chunk_elements"""
+    if rule=="analytic":
+        return Field_vector_2D_Analytic(k,vals,z,a1,a2)
+    if rule=="adaptive":
+        rule=Adaptive_rule()
+    if isinstance(rule,Adaptive_rule):
+        return Field_vector_2D_Adaptive(k,vals,z,a1,a2,rule.abs_tol,rule.rel_tol,rule.max_level)[0]
+    vals=np.asarray(vals,dtype=float)
+    Aperture_vals=Aperture_samples(a1,a2,N) #array of aperture values with N intervals across the user defined limits
+    Chunk=Chunk_length(N,chunk_size)
+    Integral=np.empty(vals.shape,dtype=complex)
+    for start in range(0,len(vals),Chunk):
+        Rows=len(vals[start:start+Chunk])
+        with Profiler.stage("integrand evaluation",evaluations=Rows*(N+1),bytes=16*Rows*(N+1)):
+            Integrand=np.exp(1j*(k/(2*z))*((vals[start:start+Chunk,np.newaxis]-Aperture_vals[np.newaxis,:])**2)) #each row holds the integrand for one screen coordinate
+        with Profiler.stage(getattr(rule,"__name__","rule")):
+            Integral[start:start+Chunk]=rule(Integrand,Aperture_vals,axis=-1) #integrates every row of the block in a single call
+    return Integral
+
+@Instrumented("Intensity_map_2D",lambda result,p:{"bytes":24*result.size,"pixels":result.size})
+def Intensity_map_2D(k,xvals,yvals,z,x1,x2,y1,y2,N,rule=simps):
+    """This function calculates the intensity map of a rectangular aperture x1'-x2', y1'-y2' over the
+    screen coordinates xvals, yvals. As the double integral separates into an x integral and a y integral,
+    each is calculated once per screen coordinate and the map is built from their outer product.
+    Element [i,j] of the returned array corresponds to xvals[i], yvals[j]"""
+    Field_x=Field_vector_2D(k,xvals,z,x1,x2,N,rule) #x integrals for every x screen coordinate
+    Field_y=Field_vector_2D(k,yvals,z,y1,y2,N,rule) #y integrals for every y screen coordinate
+    E=(k/(2*np.pi*z))*np.outer(Field_x,Field_y) #E field at every screen coordinate pair
+    return 8.85E-12*3E8*(abs(E))**2
+
+def Rule_weights(rule,N,h):
+    """This function returns the weights of the sum replacing the integral for N intervals of step size h, either the
+    self built simpsons weights of Simpson_weights (rule="simpson") or the trapezoid weights (rule="trapezoid").
+    Simpsons rule needs an even N, as in the menu; for odd N the weights would not match simps, so a ValueError is raised"""
+    if rule=="simpson":
+        if N%2!=0:
+            raise ValueError("Simpsons rule needs an even number of intervals N, not %d" % N)
+        return Simpson_weights(N,h)
+    if rule=="trapezoid":
+        Weights=np.full(N+1,h)
+        Weights[0]=Weights[N]=h/2 #first and last integrand entries multiplied by 1/2
+        return Weights
+    raise ValueError("Sweeps support the simpson and trapezoid rules, not %s" % rule)
+
+@Instrumented("Field_sweep",lambda result,p:{"evaluations":result.size*(p["N"]+1),"bytes":16*result.size*(p["N"]+1)})
+def Field_sweep(kvals,distances,vals,a1,a2,N,rule="simpson",chunk_size=None):
+    """This function performs the integration across the aperture width a1'-a2' for every screen coordinate in vals,
+    every wavenumber in kvals and every screen distance in distances, returning the complex integrals with shape
+    (len(kvals),len(distances),len(vals)). The aperture samples, the weights and the squared distances (x-x')**2
+    are found once per block of screen coordinates and shared by every wavenumber and distance, so only the
+    phase scaling k/(2*z) changes between them. rule="simpson" needs an even N (see Rule_weights)"""
+    kvals=np.atleast_1d(np.asarray(kvals,dtype=float))
+    distances=np.atleast_1d(np.asarray(distances,dtype=float))
+    vals=np.asarray(vals,dtype=float)
+    Aperture_vals=Aperture_samples(a1,a2,N)
+    Weights=Rule_weights(rule,N,(a2-a1)/N)
+    Chunk=Chunk_length(N,chunk_size)
+    Integral=np.empty((len(kvals),len(distances),len(vals)),dtype=complex)
+    for start in range(0,len(vals),Chunk):
+        Squared=(vals[start:start+Chunk,np.newaxis]-Aperture_vals[np.newaxis,:])**2 #shared by every wavenumber and distance
+        for i in range(len(kvals)):
+            for j in range(len(distances)):
+                Integral[i,j,start:start+Chunk]=np.exp(1j*(kvals[i]/(2*distances[j]))*Squared)@Weights
+    return Integral
+
+def Intensity_sweep_1D(kvals,distances,xvals,x1,x2,N,rule="simpson"):
+    """This function calculates the 1D diffraction pattern of the aperture x1'-x2' for every wavenumber in kvals and
+    every screen distance in distances, returning the intensities with shape (len(kvals),len(distances),len(xvals))"""
+    kvals=np.atleast_1d(np.asarray(kvals,dtype=float))
+    distances=np.atleast_1d(np.asarray(distances,dtype=float))
+    Scale=kvals[:,np.newaxis,np.newaxis]/(2*np.pi*distances[np.newaxis,:,np.newaxis]) #k/(2*pi*z) for every wavenumber and distance
+    return 8.85E-12*3E8*(abs(Scale*Field_sweep(kvals,distances,xvals,x1,x2,N,rule)))**2
+
+def Intensity_sweep_2D(kvals,distances,xvals,yvals,x1,x2,y1,y2,N,rule="simpson"):
+    """This function calculates the intensity map of the rectangular aperture x1'-x2', y1'-y2' for every wavenumber in
+    kvals and every screen distance in distances, returning the maps with shape
+    (len(kvals),len(distances),len(xvals),len(yvals)). As in Intensity_map_2D each map is the outer product of the x
+    and y integrals, which are found by Field_sweep"""
+    kvals=np.atleast_1d(np.asarray(kvals,dtype=float))
+    distances=np.atleast_1d(np.asarray(distances,dtype=float))
+    Field_x=Field_sweep(kvals,distances,xvals,x1,x2,N,rule)
+    Field_y=Field_sweep(kvals,distances,yvals,y1,y2,N,rule)
+    Scale=kvals[:,np.newaxis,np.newaxis,np.newaxis]/(2*np.pi*distances[np.newaxis,:,np.newaxis,np.newaxis])
+    return 8.85E-12*3E8*(abs(Scale*Field_x[:,:,:,np.newaxis]*Field_y[:,:,np.newaxis,:]))**2
+
+def Broadband_pattern_1D(wavelengths,spectrum,distances,xvals,x1,x2,N,rule="simpson"):
+    """This function calculates the 1D diffraction pattern of a broadband source, summing the patterns of every
+    wavelength weighted by the relative power in spectrum (normalised to a total of 1). Returns the intensities
+    with shape (len(distances),len(xvals))"""
+    kvals=(2*np.pi)/np.atleast_1d(np.asarray(wavelengths,dtype=float))
+    spectrum=np.atleast_1d(np.asarray(spectrum,dtype=float))
+    return np.tensordot(spectrum/spectrum.sum(),Intensity_sweep_1D(kvals,distances,xvals,x1,x2,N,rule),axes=1)
+
+def Broadband_pattern_2D(wavelengths,spectrum,distances,xvals,yvals,x1,x2,y1,y2,N,rule="simpson"):
+    """This function calculates the intensity map of a broadband source in the same way as Broadband_pattern_1D,
+    returning the maps with shape (len(distances),len(xvals),len(yvals))"""
+    kvals=(2*np.pi)/np.atleast_1d(np.asarray(wavelengths,dtype=float))
+    spectrum=np.atleast_1d(np.asarray(spectrum,dtype=float))
+    return np.tensordot(spectrum/spectrum.sum(),Intensity_sweep_2D(kvals,distances,xvals,yvals,x1,x2,y1,y2,N,rule),axes=1)
+
+def Render_rows_2D(out,start,stop,k,xvals,Field_y,z,x1,x2,N,rule):
+    """This function calculates rows start-stop of the intensity map of Intensity_map_2D, given the y integrals
+    Field_y for every y screen coordinate, and writes them straight into the output array out"""
+    Field_x=Field_vector_2D(k,xvals[start:stop],z,x1,x2,N,rule)
+    E=(k/(2*np.pi*z))*np.outer(Field_x,Field_y)
+    out[start:stop]=8.85E-12*3E8*(abs(E))**2
+
+def Render_rows_2D_shared(target,shape,start,stop,k,xvals_block,Field_y,z,x1,x2,N,rule):
+    """This function is the worker process version of Render_rows_2D, given only the x screen coordinates
+    xvals_block of rows start-stop so that each block sends just its own rows to the worker. The output array is
+    found from target, either the name of a shared memory block or a (filename, offset) pair of a memory mapped .npy file"""
+    if isinstance(target,str):
+        Block=shared_memory.SharedMemory(name=target)
+        out=np.ndarray(shape,dtype=float,buffer=Block.buf)
+        Render_rows_2D(out[start:stop],0,stop-start,k,xvals_block,Field_y,z,x1,x2,N,rule)
+        del out
+        Block.close()
+    else:
+        out=np.memmap(target[0],dtype=float,mode="r+",offset=target[1],shape=shape)
+        Render_rows_2D(out[start:stop],0,stop-start,k,xvals_block,Field_y,z,x1,x2,N,rule)
+        out.flush()
+
+@Instrumented("Intensity_map_2D_parallel",lambda result,p:{"pixels":result.size})
+def Intensity_map_2D_parallel(k,xvals,yvals,z,x1,x2,y1,y2,N,rule=simps,workers=4,block_rows=None,executor="thread",out=None):
+    """This function calculates the same intensity map as Intensity_map_2D by splitting the screen into blocks of
+    block_rows x screen coordinates (by default enough for about four blocks per worker) spread over a pool of
+    workers. With executor="thread" the NumPy work of each block runs in a thread and writes straight into the
+    output array. With executor="process" each block runs in a separate process writing into shared memory, or
+    directly into out when it is a C contiguous float memmap owning its own mapping (views of a memmap, such as
+    big[n:], go through shared memory as their file offset is not known to the workers). out may be a preallocated float array of shape
+    (len(xvals),len(yvals)). Every row is calculated in the same way whatever the blocking, so the result
+    does not depend on the number of workers"""
+    xvals=np.asarray(xvals,dtype=float)
+    shape=(len(xvals),len(yvals))
+    if out is None:
+        out=np.empty(shape)
+    if block_rows is None:
+        block_rows=-(-len(xvals)//(4*workers))
+    block_rows=max(1,int(block_rows))
+    Field_y=Field_vector_2D(k,yvals,z,y1,y2,N,rule) #y integrals shared by every block
+    Blocks=[(start,min(start+block_rows,len(xvals))) for start in range(0,len(xvals),block_rows)]
+    if executor=="thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for job in [pool.submit(Render_rows_2D,out,start,stop,k,xvals,Field_y,z,x1,x2,N,rule) for start,stop in Blocks]:
+                job.result()
+    elif executor=="process":
+        Block=None
+        if (isinstance(out,np.memmap) and out.filename is not None and isinstance(out.base,mmap.mmap)
+                and out.flags["C_CONTIGUOUS"] and out.dtype==np.float64):
+            target=(out.filename,out.offset)
+        else:
+            Block=shared_memory.SharedMemory(create=True,size=max(1,out.nbytes))
+            target=Block.name
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for job in [pool.submit(Render_rows_2D_shared,target,shape,start,stop,k,xvals[start:stop],Field_y,z,x1,x2,N,rule) for start,stop in Blocks]:
+                    job.result()
+            if Block is not None:
+                out[...]=np.ndarray(shape,dtype=float,buffer=Block.buf) #single copy out of shared memory once all blocks are done
+        finally:
+            if Block is not None:
+                Block.close()
+                Block.unlink()
+    else:
+        raise ValueError("Unknown executor: %s" % executor)
+    return out
+
+def Aperture_grid(Mx,My,dx):
+    """This function sets up the sampled aperture plane of Mx by My points of spacing dx centred on the origin,
+    returning the x' and y' coordinates of every sample as two 2D arrays (element [i,j] at x'[i], y'[j])"""
+    Aperture_x=(np.arange(Mx)-Mx//2)*dx
+    Aperture_y=(np.arange(My)-My//2)*dx
+    return np.meshgrid(Aperture_x,Aperture_y,indexing="ij")
+
+def Rectangular_aperture_mask(X,Y,x1,x2,y1,y2):
+    """This function returns the transmission (1 inside, 0 outside) of the rectangular aperture x1'-x2', y1'-y2'
+    sampled at the coordinates X, Y returned by Aperture_grid"""
+    return ((X>=x1)&(X<=x2)&(Y>=y1)&(Y<=y2)).astype(float)
+
+def Circular_aperture_mask(X,Y,radius,x0=0.0,y0=0.0):
+    """This function returns the transmission of a circular aperture of the given radius centred on x0', y0'
+    sampled at the coordinates X, Y returned by Aperture_grid"""
+    return (((X-x0)**2+(Y-y0)**2)<=radius**2).astype(float)
+
+@Instrumented("Fresnel_propagate_FFT",lambda result,p:{"bytes":16*result[0].size,"pixels":result[0].size})
+def Fresnel_propagate_FFT(aperture,dx,k,z,method="auto",pad_factor=1):
+    """This function propagates the sampled aperture transmission array (spacing dx, centred as in Aperture_grid)
+    a distance z using FFTs, returning the E field on the screen together with its x and y screen coordinates.
+    The E field uses the same constants as the quadrature functions, so 8.85E-12*3E8*abs(E)**2 is the intensity.
+
+    method="transfer" multiplies the angular spectrum by the Fresnel transfer function, keeping the spacing dx.
+    method="single" performs the single FFT Fresnel integral, giving a screen spacing of wavelength*z/(M*dx).
+    method="auto" chooses between them with the Fresnel number of the sampled window, L**2/(wavelength*z*M):
+    when this is at least 1 the transfer function is adequately sampled, otherwise the single FFT method is.
+    The aperture is zero padded to pad_factor times its size before propagating, and a warning is given if
+    the chirp of the chosen method is aliased on the padded grid.
+
+    Check_FFT_propagator in benchmark_fresnel.py compares a 200 by 100 um rectangle (M=1024, dx=2 um, 500 nm)
+    with Intensity_map_2D: the single FFT method at z=5 cm is within 1E-3 of the peak intensity (about 1.6E-4) and
+    the transfer function at z=2 mm within 5E-2 (about 2.5E-2), the latter limited by ringing from the hard edged
+    sampled mask rather than the propagation, so it falls as dx is reduced"""
+    aperture=np.asarray(aperture)
+    wavelength=2*math.pi/k
+    Mx=int(round(pad_factor*aperture.shape[0]))
+    My=int(round(pad_factor*aperture.shape[1]))
+    U=np.zeros((Mx,My),dtype=complex)
+    ox=Mx//2-aperture.shape[0]//2
+    oy=My//2-aperture.shape[1]//2 #offsets keeping the origin of the aperture at the centre of the padded grid
+    U[ox:ox+aperture.shape[0],oy:oy+aperture.shape[1]]=aperture
+    Fresnel_number=min(Mx,My)*dx**2/(wavelength*z) #Fresnel number of the padded window, L**2/(wavelength*z*M)
+    if method=="auto":
+        method="transfer" if Fresnel_number>=1 else "single"
+    if method=="transfer":
+        if Fresnel_number<1:
+            warnings.warn("Transfer function is aliased (window Fresnel number %.3g < 1); use the single FFT method or a finer grid" % Fresnel_number)
+        fx=np.fft.fftfreq(Mx,dx)
+        fy=np.fft.fftfreq(My,dx) #spatial frequencies in FFT order
+        H=1j*np.exp(-1j*math.pi*wavelength*z*(fx[:,np.newaxis]**2+fy[np.newaxis,:]**2)) #Fresnel transfer function
+        E=np.fft.fftshift(np.fft.ifft2(np.fft.fft2(np.fft.ifftshift(U))*H))
+        xvals=(np.arange(Mx)-Mx//2)*dx
+        yvals=(np.arange(My)-My//2)*dx
+    elif method=="single":
+        if Fresnel_number>1:
+            warnings.warn("Single FFT chirp is aliased (window Fresnel number %.3g > 1); use the transfer function method or a larger window" % Fresnel_number)
+        X,Y=Aperture_grid(Mx,My,dx)
+        Chirp=np.exp(1j*(k/(2*z))*(X**2+Y**2)) #phase of the integrand due to each aperture coordinate
+        Transform=np.fft.fftshift(np.fft.fft2(np.fft.ifftshift(U*Chirp)))*dx**2
+        xvals=(np.arange(Mx)-Mx//2)*wavelength*z/(Mx*dx)
+        yvals=(np.arange(My)-My//2)*wavelength*z/(My*dx) #screen coordinates of the transform samples
+        E=(k/(2*math.pi*z))*np.exp(1j*(k/(2*z))*(xvals[:,np.newaxis]**2+yvals[np.newaxis,:]**2))*Transform
+    else:
+        raise ValueError("Unknown propagation method: %s" % method)
+    return E,xvals,yvals
+
+class Result_cache:
+    """This class stores calculated intensity arrays as .npy files in a directory, named by a hash of the parameters
+    that produced them. A stored result is loaded memory mapped, so no copy of the data is made, and is read only
+    whether or not it was just calculated. When the files exceed max_bytes the least recently used ones are deleted.
+    Several processes may share the directory. hits and misses count the lookups of this instance"""
+    Version=1 #changed whenever stored results would no longer match the calculation functions
+
+    def __init__(self,directory,max_bytes=2**30):
+        self.directory=directory
+        self.max_bytes=max_bytes
+        self.hits=0
+        self.misses=0
+        os.makedirs(directory,exist_ok=True)
+
+    def key(self,kind,parameters):
+        """This method returns the hash of the result kind and its normalised parameters. Floats are stored by their
+        exact value (so 1e-4 and 0.0001 match), -0.0 is made 0.0 and functions are named by their __name__"""
+        Normalised={"kind":kind,"version":self.Version}
+        for name,value in parameters.items():
+            if callable(value):
+                value=value.__name__
+            elif isinstance(value,(float,np.floating)):
+                value=float(value)+0.0
+            elif isinstance(value,(int,np.integer)):
+                value=int(value)
+            Normalised[name]=value
+        return hashlib.sha256(json.dumps(Normalised,sort_keys=True).encode()).hexdigest()
+
+    def path(self,key):
+        return os.path.join(self.directory,key+".npy")
+
+    def load(self,key):
+        """This method returns the memory mapped result stored under key, or None if there is none"""
+        try:
+            Result=np.load(self.path(key),mmap_mode="r")
+        except (FileNotFoundError,ValueError):
+            self.misses+=1
+            return None
+        try:
+            os.utime(self.path(key)) #marks the result as most recently used
+        except FileNotFoundError: #evicted by another process since it was opened, the mapping stays valid
+            pass
+        self.hits+=1
+        return Result
+
+    def save(self,key,result):
+        """This method stores result under key, then evicts the least recently used results until the cache fits
+        in max_bytes. The file is written under a temporary name first so readers never see a partial result"""
+        Temporary=self.path(key)+".%d.tmp" % os.getpid()
+        with open(Temporary,"wb") as handle:
+            np.save(handle,np.asarray(result))
+        os.replace(Temporary,self.path(key))
+        self.evict()
+
+    def evict(self):
+        """This method deletes the least recently used results until the total size is within max_bytes. Files
+        deleted meanwhile by another process sharing the directory are skipped"""
+        Entries=[]
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                try:
+                    info=os.stat(os.path.join(self.directory,name))
+                except FileNotFoundError:
+                    continue
+                Entries.append((info.st_mtime,info.st_size,name))
+        Total=sum(size for mtime,size,name in Entries)
+        for mtime,size,name in sorted(Entries):
+            if Total<=self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory,name))
+            except FileNotFoundError:
+                pass
+            Total-=size
+
+    def cached(self,kind,parameters,compute):
+        """This method returns the stored result for kind and parameters if there is one, otherwise it calls
+        compute() and stores what it returns. Either way the result is the read only memory mapped file, unless it
+        was too large to be kept, when it is the calculated array made read only"""
+        key=self.key(kind,parameters)
+        Result=self.load(key)
+        if Result is None:
+            Result=np.asarray(compute())
+            self.save(key,Result)
+            try:
+                Result=np.load(self.path(key),mmap_mode="r")
+            except (FileNotFoundError,ValueError): #evicted at once
+                Result.flags.writeable=False
+        return Result
+
+    def stats(self):
+        """This method returns the hit and miss counts together with the number and total size of stored results"""
+        Sizes=[]
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                try:
+                    Sizes.append(os.path.getsize(os.path.join(self.directory,name)))
+                except FileNotFoundError:
+                    pass
+        return {"hits":self.hits,"misses":self.misses,"entries":len(Sizes),"bytes":sum(Sizes)}
+
+Integration_rules={"simpson":simps,"trapezoid":trapz,"analytic":"analytic","adaptive":"adaptive"} #rule names accepted by the pattern functions
+
+@Instrumented("Pattern_1D",lambda result,p:{"pixels":len(result[1])})
+def Pattern_1D(k,x1,x2,z,N,xmin,xmax,NumPoints=200,rule="simpson",cache=None,abs_tol=0.0,rel_tol=1E-6):
+    """This function calculates the 1D diffraction pattern of the aperture x1'-x2' on NumPoints screen coordinates
+    from xmin to xmax, returning the screen coordinates and intensities. rule="simpson" uses the self built
+    simpsons rule of Intensity_function_1D_batch, "adaptive" uses Pattern_1D_Adaptive with the tolerances abs_tol
+    and rel_tol, and any other name in Integration_rules uses Field_vector_2D. N is unused by the analytic and
+    adaptive rules. If a Result_cache is given, a previously stored pattern with the same parameters is returned instead"""
+    if rule=="adaptive":
+        return Pattern_1D_Adaptive(k,x1,x2,z,xmin,xmax,NumPoints,abs_tol,rel_tol,cache)[:2]
+    xvals=Screen_grid(xmin,xmax,NumPoints)
+    def compute():
+        if rule=="simpson":
+            return Intensity_function_1D_batch(k,xvals,z,x1,x2,N)
+        return 8.85E-12*3E8*(abs((k/(2*np.pi*z))*Field_vector_2D(k,xvals,z,x1,x2,N,Integration_rules[rule])))**2
+    if cache is None:
+        return xvals,compute()
+    Parameters={"k":k,"x1":x1,"x2":x2,"z":z,"N":N,"xmin":xmin,"xmax":xmax,"NumPoints":NumPoints,"rule":rule}
+    if rule=="analytic":
+        del Parameters["N"] #the closed form does not depend on N
+    return xvals,cache.cached("1D",Parameters,compute)
+
+@Instrumented("Pattern_1D_Adaptive",lambda result,p:{"pixels":len(result[1])})
+def Pattern_1D_Adaptive(k,x1,x2,z,xmin,xmax,NumPoints=200,abs_tol=0.0,rel_tol=1E-6,cache=None):
+    """This function calculates the 1D diffraction pattern of Pattern_1D with Intensity_function_1D_Adaptive,
+    refining each screen coordinate until its integral is within max(abs_tol,rel_tol*abs(integral)). Returns the
+    screen coordinates, the intensities, the number of integrand evaluations and the error estimate of each
+    intensity. If a Result_cache is given, a previously stored pattern with the same tolerances is returned instead"""
+    xvals=Screen_grid(xmin,xmax,NumPoints)
+    def compute():
+        return np.stack(Intensity_function_1D_Adaptive(k,xvals,z,x1,x2,abs_tol,rel_tol)) #intensities, evaluations and errors stored as one array
+    if cache is None:
+        Result=compute()
+    else:
+        Parameters={"k":k,"x1":x1,"x2":x2,"z":z,"xmin":xmin,"xmax":xmax,"NumPoints":NumPoints,"abs_tol":abs_tol,"rel_tol":rel_tol}
+        Result=cache.cached("1D adaptive",Parameters,compute)
+    return xvals,Result[0],Result[1].astype(int),Result[2]
+
+@Instrumented("Pattern_2D",lambda result,p:{"pixels":result[2].size})
+def Pattern_2D(k,x1,x2,y1,y2,z,N,xmin,xmax,ymin,ymax,NumPoints=100,rule="simpson",workers=1,cache=None,abs_tol=0.0,rel_tol=1E-6):
+    """This function calculates the 2D diffraction pattern of the rectangular aperture x1'-x2', y1'-y2' on a
+    NumPoints by NumPoints screen, returning the x and y screen coordinates and the intensity map. rule is a name
+    in Integration_rules, and with more than one worker the map is rendered by Intensity_map_2D_parallel.
+    rule="adaptive" uses Pattern_2D_Adaptive with the tolerances abs_tol and rel_tol in a single worker.
+    If a Result_cache is given, a previously stored map with the same parameters is returned instead"""
+    if rule=="adaptive":
+        return Pattern_2D_Adaptive(k,x1,x2,y1,y2,z,xmin,xmax,ymin,ymax,NumPoints,abs_tol,rel_tol,cache)[:3]
+    xvals=Screen_grid(xmin,xmax,NumPoints)
+    yvals=Screen_grid(ymin,ymax,NumPoints)
+    def compute():
+        if workers>1:
+            return Intensity_map_2D_parallel(k,xvals,yvals,z,x1,x2,y1,y2,N,Integration_rules[rule],workers=workers)
+        return Intensity_map_2D(k,xvals,yvals,z,x1,x2,y1,y2,N,Integration_rules[rule])
+    if cache is None:
+        return xvals,yvals,compute()
+    Parameters={"k":k,"x1":x1,"x2":x2,"y1":y1,"y2":y2,"z":z,"N":N,"xmin":xmin,"xmax":xmax,"ymin":ymin,"ymax":ymax,"NumPoints":NumPoints,"rule":rule} #the worker count does not change the map so is not part of the key
+    if rule=="analytic":
+        del Parameters["N"] #the closed form does not depend on N
+    return xvals,yvals,cache.cached("2D",Parameters,compute)
+
+@Instrumented("Pattern_2D_Adaptive",lambda result,p:{"pixels":result[2].size})
+def Pattern_2D_Adaptive(k,x1,x2,y1,y2,z,xmin,xmax,ymin,ymax,NumPoints=100,abs_tol=0.0,rel_tol=1E-6,cache=None):
+    """This function calculates the 2D diffraction pattern of Pattern_2D with Intensity_map_2D_Adaptive, returning the
+    x and y screen coordinates, the intensity map, the number of integrand evaluations used for each screen coordinate
+    pair and the error estimate of each intensity. If a Result_cache is given, a previously stored map with the same
+    tolerances is returned instead"""
+    xvals=Screen_grid(xmin,xmax,NumPoints)
+    yvals=Screen_grid(ymin,ymax,NumPoints)
+    def compute():
+        return np.stack(Intensity_map_2D_Adaptive(k,xvals,yvals,z,x1,x2,y1,y2,abs_tol,rel_tol)) #intensities, evaluations and errors stored as one array
+    if cache is None:
+        Result=compute()
+    else:
+        Parameters={"k":k,"x1":x1,"x2":x2,"y1":y1,"y2":y2,"z":z,"xmin":xmin,"xmax":xmax,"ymin":ymin,"ymax":ymax,"NumPoints":NumPoints,"abs_tol":abs_tol,"rel_tol":rel_tol}
+        Result=cache.cached("2D adaptive",Parameters,compute)
+    return xvals,yvals,Result[0],Result[1].astype(int),Result[2]
+
+def Compare_rules_1D(k,x1,x2,z,N,xmin,xmax,NumPoints=200):
+    """This function calculates the 1D diffraction pattern of the aperture x1'-x2' with the inbuilt simpsons and
+    trapezoid rules, returning the screen coordinates, both sets of intensities and their absolute difference"""
+    xvals=Screen_grid(xmin,xmax,NumPoints)
+    yvals_simps=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Field_vector_2D(k,xvals,z,x1,x2,N,simps)))**2
+    yvals_trapz=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Field_vector_2D(k,xvals,z,x1,x2,N,trapz)))**2
+    ydiff=abs(yvals_simps-yvals_trapz) #difference between values produced from simpson's and trapezoid integrations
+    return xvals,yvals_simps,yvals_trapz,ydiff
+
+def Write_stream_metadata(path,Metadata):
+    """This function atomically replaces the metadata file path+".json" of a streamed map, so it is never left partly written"""
+    with open(path+".json.tmp","w") as handle:
+        json.dump(Metadata,handle,indent=1)
+    os.replace(path+".json.tmp",path+".json")
+
+@Instrumented("Stream_pattern_2D",lambda result,p:{"pixels":result.size})
+def Stream_pattern_2D(path,k,x1,x2,y1,y2,z,N,xmin,xmax,ymin,ymax,NumPoints_x,NumPoints_y=None,rule="simpson",tile_size=2048,abs_tol=0.0,rel_tol=1E-6):
+    """This function calculates the 2D diffraction pattern of Pattern_2D on a NumPoints_x by NumPoints_y screen in
+    tiles of tile_size by tile_size screen coordinates, writing each tile straight into the memory mapped .npy file
+    path so that only one tile is held in memory. The parameters, extents and the number of tiles completed are
+    kept in path+".json" and updated after every tile is flushed to disk. If the run is interrupted, calling this
+    function again with the same parameters resumes from the first unfinished tile, provided the .npy file still has
+    the expected shape and dtype. abs_tol and rel_tol are the tolerances of rule="adaptive". Returns the memory mapped map"""
+    if NumPoints_y is None:
+        NumPoints_y=NumPoints_x
+    Metadata={"wavelength":(2*math.pi)/k,"k":k,"x1":x1,"x2":x2,"y1":y1,"y2":y2,"z":z,"N":N,
+              "xmin":xmin,"xmax":xmax,"ymin":ymin,"ymax":ymax,"NumPoints_x":NumPoints_x,"NumPoints_y":NumPoints_y,
+              "rule":rule,"tile_size":tile_size,"dtype":"float64"}
+    Rule=Integration_rules[rule]
+    if rule=="adaptive":
+        Metadata["abs_tol"]=abs_tol
+        Metadata["rel_tol"]=rel_tol
+        Rule=Adaptive_rule(abs_tol,rel_tol)
+    Tiles_done=0
+    Stored=None
+    if os.path.exists(path) and os.path.exists(path+".json"):
+        with open(path+".json") as handle:
+            Stored=json.load(handle)
+    zvals=None
+    if Stored is not None and Stored.get("tiles_done") is not None and {key:Stored.get(key) for key in Metadata}==Metadata:
+        try:
+            zvals=np.lib.format.open_memmap(path,mode="r+")
+        except ValueError: #not a readable .npy file
+            zvals=None
+        if zvals is not None and (zvals.shape!=(NumPoints_x,NumPoints_y) or zvals.dtype!=np.float64):
+            del zvals
+            zvals=None #the file no longer holds this map, so start again
+        if zvals is not None:
+            Tiles_done=Stored["tiles_done"] #resumes a run with the same parameters
+    if zvals is None:
+        Metadata["tiles_done"]=0
+        Write_stream_metadata(path,Metadata) #recorded before the .npy is replaced, so an interrupted start never matches an older run
+        zvals=np.lib.format.open_memmap(path,mode="w+",dtype=float,shape=(NumPoints_x,NumPoints_y))
+    xvals=np.linspace(xmin,xmax,NumPoints_x)
+    yvals=np.linspace(ymin,ymax,NumPoints_y)
+    Row_blocks=range(0,NumPoints_x,tile_size)
+    Column_blocks=range(0,NumPoints_y,tile_size)
+    Field_y=Field_vector_2D(k,yvals,z,y1,y2,N,Rule) #y integrals for every y screen coordinate, shared by every tile
+    Tile=0
+    for row in Row_blocks:
+        Field_x=None
+        for column in Column_blocks:
+            if Tile>=Tiles_done:
+                if Field_x is None:
+                    Field_x=Field_vector_2D(k,xvals[row:row+tile_size],z,x1,x2,N,Rule)
+                E=(k/(2*np.pi*z))*np.outer(Field_x,Field_y[column:column+tile_size])
+                zvals[row:row+tile_size,column:column+tile_size]=8.85E-12*3E8*(abs(E))**2
+                zvals.flush()
+                Metadata["tiles_done"]=Tile+1
+                Write_stream_metadata(path,Metadata) #progress only recorded once the tile is on disk
+            Tile+=1
+    Metadata["tiles_done"]=Tile
+    Metadata["complete"]=True
+    Write_stream_metadata(path,Metadata)
+    return zvals
+
+def Load_streamed_pattern(path):
+    """This function opens a map written by Stream_pattern_2D read only and memory mapped, returning it with its metadata"""
+    with open(path+".json") as handle:
+        Metadata=json.load(handle)
+    return np.load(path,mmap_mode="r"),Metadata
+
+Job_defaults={"kind":"1D","rule":"simpson","workers":1} #values used for any parameter missing from a batch job
+Job_integers=("N","NumPoints","NumPoints_y","workers","tile_size")
+Job_strings=("name","kind","rule")
+Job_positive=("wavelength","k","z") #must be greater than zero, as the menu requires of the wavelength and distance
+Job_non_negative=("abs_tol","rel_tol")
+Job_required={"1D":("x1","x2","z","N","xmin","xmax"),
+              "compare":("x1","x2","z","N","xmin","xmax"),
+              "2D":("x1","x2","y1","y2","z","N","xmin","xmax","ymin","ymax"),
+              "stream":("x1","x2","y1","y2","z","N","xmin","xmax","ymin","ymax")} #parameters every job of each kind must give
+Job_optional=("name","kind","rule","workers","NumPoints","wavelength","k","abs_tol","rel_tol")
+Job_adaptive_optional=("abs_tol","rel_tol") #only accepted with rule "adaptive"
+Job_stream_optional=("NumPoints_y","tile_size") #only accepted by stream jobs
+
+def Load_jobs(path):
+    """This function reads a batch of parameter sets from a JSON file (a list of objects, or an object with a
+    "jobs" list) or a CSV file with one parameter set per row and the parameter names as its header"""
+    if path.lower().endswith(".csv"):
+        with open(path,newline="") as handle:
+            return [{key:value for key,value in row.items() if value not in (None,"")} for row in csv.DictReader(handle)]
+    with open(path) as handle:
+        jobs=json.load(handle)
+    if isinstance(jobs,dict):
+        jobs=jobs["jobs"]
+    return jobs
+
+def Job_parameters(job,number):
+    """This function fills in the defaults of a batch job, checks that it has every parameter its kind needs, a known
+    rule, exactly one of wavelength and k and no unknown parameters (tolerances only with the adaptive rule), and converts every parameter to its proper type.
+    The name must be a string usable as a file name, the wavelength, k and z positive, every integer parameter at
+    least 1 and the tolerances not negative. Any problem raises a ValueError naming the job. The wavelength is
+    replaced by the wavenumber k used by the calculation functions"""
+    parameters=dict(Job_defaults)
+    parameters["name"]="job_%04d" % number
+    parameters.update(job)
+    name=parameters["name"]
+    if not isinstance(name,str) or name in ("",".","..") or os.sep in name or (os.altsep and os.altsep in name):
+        raise ValueError("Job %d has invalid name %r, expected a file name without a path separator" % (number,name))
+    kind=parameters["kind"]
+    if kind not in Job_required:
+        raise ValueError("Job %s has unknown kind %s" % (name,kind))
+    Missing=[key for key in Job_required[kind] if key not in parameters]
+    if Missing:
+        raise ValueError("Job %s of kind %s is missing %s" % (name,kind,", ".join(Missing)))
+    Allowed=Job_required[kind]+Job_optional+(Job_stream_optional if kind=="stream" else ())
+    Unknown=[key for key in parameters if key not in Allowed]
+    if Unknown:
+        raise ValueError("Job %s has unknown parameters %s" % (name,", ".join(sorted(Unknown))))
+    if parameters["rule"] not in Integration_rules:
+        raise ValueError("Job %s has unknown rule %s, expected one of %s" % (name,parameters["rule"],", ".join(Integration_rules)))
+    Tolerances=[key for key in Job_adaptive_optional if key in parameters]
+    if Tolerances and parameters["rule"]!="adaptive":
+        raise ValueError("Job %s gives %s with rule %s, but tolerances are only used by the adaptive rule" % (name,", ".join(Tolerances),parameters["rule"]))
+    if ("wavelength" in parameters)==("k" in parameters):
+        raise ValueError("Job %s must give exactly one of wavelength and k" % name)
+    for key,value in parameters.items():
+        try:
+            if key in Job_integers:
+                parameters[key]=int(value)
+            elif key not in Job_strings:
+                parameters[key]=float(value)
+        except (TypeError,ValueError):
+            raise ValueError("Job %s has invalid value %r for %s" % (name,value,key))
+        if key in Job_positive and not parameters[key]>0:
+            raise ValueError("Job %s has %s=%r, expected a value greater than 0" % (name,key,value))
+        if key in Job_integers and parameters[key]<1:
+            raise ValueError("Job %s has %s=%r, expected an integer of at least 1" % (name,key,value))
+        if key in Job_non_negative and not parameters[key]>=0:
+            raise ValueError("Job %s has %s=%r, expected a value of at least 0" % (name,key,value))
+    if "wavelength" in parameters:
+        parameters["k"]=(2*math.pi)/parameters.pop("wavelength")
+    return parameters
+
+def Run_job(parameters,cache=None):
+    """This function runs one batch job from Job_parameters, returning a dictionary of result arrays. Adaptive 1D and
+    2D patterns also return the number of integrand evaluations and the error estimate of every intensity. 1D and 2D
+    patterns are looked up in and added to the Result_cache cache if one is given"""
+    p=parameters
+    if p["rule"]=="adaptive" and p["kind"]=="1D":
+        xvals,yvals,Evaluations,Error=Pattern_1D_Adaptive(p["k"],p["x1"],p["x2"],p["z"],p["xmin"],p["xmax"],p.get("NumPoints",200),p.get("abs_tol",0.0),p.get("rel_tol",1E-6),cache)
+        return {"xvals":xvals,"yvals":yvals,"evaluations":Evaluations,"error":Error}
+    if p["rule"]=="adaptive" and p["kind"]=="2D":
+        xvals,yvals,zvals,Evaluations,Error=Pattern_2D_Adaptive(p["k"],p["x1"],p["x2"],p["y1"],p["y2"],p["z"],p["xmin"],p["xmax"],p["ymin"],p["ymax"],p.get("NumPoints",100),p.get("abs_tol",0.0),p.get("rel_tol",1E-6),cache)
+        return {"xvals":xvals,"yvals":yvals,"zvals":zvals,"evaluations":Evaluations,"error":Error}
+    if p["kind"]=="1D":
+        xvals,yvals=Pattern_1D(p["k"],p["x1"],p["x2"],p["z"],p["N"],p["xmin"],p["xmax"],p.get("NumPoints",200),p["rule"],cache)
+        return {"xvals":xvals,"yvals":yvals}
+    if p["kind"]=="2D":
+        xvals,yvals,zvals=Pattern_2D(p["k"],p["x1"],p["x2"],p["y1"],p["y2"],p["z"],p["N"],p["xmin"],p["xmax"],p["ymin"],p["ymax"],p.get("NumPoints",100),p["rule"],p["workers"],cache)
+        return {"xvals":xvals,"yvals":yvals,"zvals":zvals}
+    xvals,yvals_simps,yvals_trapz,ydiff=Compare_rules_1D(p["k"],p["x1"],p["x2"],p["z"],p["N"],p["xmin"],p["xmax"],p.get("NumPoints",200))
+    return {"xvals":xvals,"yvals_simps":yvals_simps,"yvals_trapz":yvals_trapz,"ydiff":ydiff}
+
+def Run_batch(jobs,output_dir,cache=None,renderer=None):
+    """This function runs every job in the list jobs without any prompts or plots, saving the result arrays and
+    parameters of each to output_dir/<name>.npz and returning the list of files written. Aperture samples,
+    simpsons weights and screen grids are cached, so jobs sharing them reuse the same arrays, and results are
+    reused from the Result_cache cache if one is given. If a Batch_renderer is given an image of each result is saved too"""
+    Parameters=[Job_parameters(job,number) for number,job in enumerate(jobs)] #all jobs checked before any are run
+    Names=[parameters["name"] for parameters in Parameters]
+    Duplicates=sorted(set(name for name in Names if Names.count(name)>1))
+    if Duplicates:
+        raise ValueError("Job names must be unique, repeated names: %s" % ", ".join(Duplicates))
+    os.makedirs(output_dir,exist_ok=True)
+    Paths=[]
+    for parameters in Parameters:
+        start=time.perf_counter()
+        if parameters["kind"]=="stream": #written tile by tile to a memory mapped .npy with its metadata alongside
+            p=parameters
+            path=os.path.join(output_dir,p["name"]+".npy")
+            Results={"zvals":Stream_pattern_2D(path,p["k"],p["x1"],p["x2"],p["y1"],p["y2"],p["z"],p["N"],p["xmin"],p["xmax"],p["ymin"],p["ymax"],p.get("NumPoints",100),p.get("NumPoints_y"),p["rule"],p.get("tile_size",2048),p.get("abs_tol",0.0),p.get("rel_tol",1E-6))}
+        else:
+            Results=Run_job(parameters,cache)
+            path=os.path.join(output_dir,parameters["name"]+".npz")
+            np.savez(path,parameters=json.dumps(parameters),**Results)
+        Paths.append(path)
+        if renderer is not None:
+            renderer.render(parameters,Results)
+        print("%s: %s pattern saved to %s in %.3f s" % (parameters["name"],parameters["kind"],path,time.perf_counter()-start))
+    if cache is not None:
+        print("Result cache: %(hits)d hits, %(misses)d misses, %(entries)d results stored in %(bytes)d bytes" % cache.stats())
+    return Paths
+
+def Decimate_1D(xvals,yvals,max_points=4000):
+    """This function reduces a line of more than max_points values for display by splitting it into max_points/2 bins
+    and keeping the minimum and maximum of each, drawn as a vertical stroke at the bin centre. This min/max envelope
+    keeps every peak and trough that full resolution would show"""
+    yvals=np.asarray(yvals)
+    if len(yvals)<=max_points:
+        return np.asarray(xvals),yvals
+    Starts=np.linspace(0,len(yvals),max(1,max_points//2)+1).astype(int)[:-1] #first index of each bin
+    Centres=np.asarray(xvals)[(Starts+np.append(Starts[1:],len(yvals))-1)//2]
+    Envelope=np.empty(2*len(Starts))
+    Envelope[0::2]=np.minimum.reduceat(yvals,Starts)
+    Envelope[1::2]=np.maximum.reduceat(yvals,Starts)
+    return np.repeat(Centres,2),Envelope
+
+def Decimate_2D(zvals,max_pixels=1000):
+    """This function reduces an intensity map larger than max_pixels along either axis for display by max pooling,
+    so that no peak is lost. Blocks of rows are read one at a time, so memory mapped maps are never loaded whole"""
+    Factor_x=-(-zvals.shape[0]//max_pixels)
+    Factor_y=-(-zvals.shape[1]//max_pixels) #pooling factors rounded up
+    if Factor_x==1 and Factor_y==1:
+        return zvals
+    Columns=np.arange(0,zvals.shape[1],Factor_y)
+    Pooled=np.empty((-(-zvals.shape[0]//Factor_x),len(Columns)))
+    for i,row in enumerate(range(0,zvals.shape[0],Factor_x)):
+        Pooled[i]=np.maximum.reduceat(np.max(zvals[row:row+Factor_x],axis=0),Columns)
+    return Pooled
+
+@Instrumented("Plot_pattern_1D")
+def Plot_pattern_1D(ax,xvals,yvals,label=None,max_points=4000):
+    """This function draws a 1D pattern on the axes ax, decimated by Decimate_1D, returning the line"""
+    line,=ax.plot(*Decimate_1D(xvals,yvals,max_points),label=label)
+    ax.set_xlabel("Screen coordinate (m)")
+    ax.set_ylabel("Relative Intensity")
+    ax.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #sets both axes ticks to scientific notation for improved formatting
+    return line
+
+@Instrumented("Plot_map_2D")
+def Plot_map_2D(fig,ax,zvals,extent,max_pixels=1000):
+    """This function draws a 2D intensity map on the axes ax of the figure fig to the given extent
+    [xmin,xmax,ymin,ymax], decimated by Decimate_2D, returning the image and its colourbar"""
+    image=ax.imshow(Decimate_2D(zvals,max_pixels), extent=extent) #plots image to the extent of the user defined screen limits
+    ax.locator_params(axis="both", nbins=5) #sets both axes to contain only 5 ticks
+    cbar=fig.colorbar(image,ax=ax)
+    cbar.set_label("Relative Intensity", rotation=270, labelpad=15) #labels colourbar. Label is rotated to vertical and set a suitable distance to the colourbar itself
+    cbar.formatter.set_powerlimits((0, 0)) #Colourbar given scientific notation for improved formatting
+    cbar.update_ticks()
+    ax.set_xlabel("x screen coordinate (m)")
+    ax.set_ylabel("y screen coordinate (m)")
+    ax.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #both axes given scientific notation for improved formatting
+    return image,cbar
+
+class Batch_renderer:
+    """This class saves images of many results to files without a display. One figure is set up for each kind of
+    result the first time it is needed and afterwards only its data is replaced, so the figure, axes, colourbar
+    and labels are not rebuilt for every result"""
+
+    def __init__(self,output_dir,fmt="png",max_points=4000,max_pixels=1000,dpi=100):
+        self.output_dir=output_dir
+        self.fmt=fmt
+        self.max_points=max_points
+        self.max_pixels=max_pixels
+        self.dpi=dpi
+        self.figures={}
+        os.makedirs(output_dir,exist_ok=True)
+
+    def save(self,fig,ax,name):
+        ax.set_title(name)
+        path=os.path.join(self.output_dir,"%s.%s" % (name,self.fmt))
+        with Profiler.stage("savefig"):
+            fig.savefig(path,dpi=self.dpi)
+        return path
+
+    def render_1D(self,name,xvals,yvals):
+        if "1D" not in self.figures:
+            fig,ax=plt.subplots()
+            self.figures["1D"]=(fig,ax,Plot_pattern_1D(ax,[],[]))
+        fig,ax,line=self.figures["1D"]
+        line.set_data(*Decimate_1D(xvals,yvals,self.max_points))
+        ax.relim()
+        ax.autoscale_view()
+        return self.save(fig,ax,name)
+
+    def render_compare(self,name,xvals,yvals_simps,yvals_trapz,ydiff):
+        """This method draws both patterns on the upper axes and their absolute difference ydiff on the lower axes,
+        as the menu does in two separate figures"""
+        if "compare" not in self.figures:
+            fig,(ax,ax_diff)=plt.subplots(2,1,sharex=True,figsize=(6.4,8))
+            Lines=(Plot_pattern_1D(ax,[],[],"Simpsons"),Plot_pattern_1D(ax,[],[],"Trapezoid"),Plot_pattern_1D(ax_diff,[],[]))
+            ax.legend()
+            ax_diff.set_ylabel("Absolute difference")
+            self.figures["compare"]=(fig,ax,ax_diff,Lines)
+        fig,ax,ax_diff,Lines=self.figures["compare"]
+        for line,yvals in zip(Lines,(yvals_simps,yvals_trapz,ydiff)):
+            line.set_data(*Decimate_1D(xvals,yvals,self.max_points))
+        for axes in (ax,ax_diff):
+            axes.relim()
+            axes.autoscale_view()
+        return self.save(fig,ax,name)
+
+    def render_2D(self,name,zvals,extent):
+        Pooled=Decimate_2D(zvals,self.max_pixels)
+        if "2D" not in self.figures:
+            fig,ax=plt.subplots()
+            self.figures["2D"]=(fig,ax)+Plot_map_2D(fig,ax,Pooled,extent,self.max_pixels)
+        fig,ax,image,cbar=self.figures["2D"]
+        image.set_data(Pooled)
+        image.set_extent(extent)
+        image.set_clim(np.min(Pooled),np.max(Pooled))
+        cbar.update_normal(image)
+        return self.save(fig,ax,name)
+
+    def render(self,parameters,Results):
+        """This method saves the image of one batch job from its Job_parameters and the result arrays of Run_job
+        (or, for stream jobs, the memory mapped map), returning the path of the image"""
+        p=parameters
+        if p["kind"]=="1D":
+            return self.render_1D(p["name"],Results["xvals"],Results["yvals"])
+        if p["kind"]=="compare":
+            return self.render_compare(p["name"],Results["xvals"],Results["yvals_simps"],Results["yvals_trapz"],Results["ydiff"])
+        return self.render_2D(p["name"],Results["zvals"],[p["xmin"],p["xmax"],p["ymin"],p["ymax"]])
+
+    def close(self):
+        for figure in self.figures.values():
+            plt.close(figure[0])
+        self.figures={}
+
 def input_checker(a):                                                 
     """This function checks whether an input is a float"""
     try: 
@@ -101,238 +1106,230 @@ def N_check(a): #used for the intervals N which must be a positive integer
     except ValueError:
         return False
     
-Loop=True #loop for menu selection initiated
-print("Welcome to the program!")
-while Loop:
-    print ()
-    menu_text() #menu detailing the various menu selections. Defined as a function above
-    Menu_selection=input("Please enter one of the above Menu Options [1-5]: ")
-    print()
+def Menu():
+    """This function runs the interactive menu, prompting for the parameters of each section and plotting the results"""
+    Loop=True #loop for menu selection initiated
+    print("Welcome to the program!")
+    while Loop:
+        print ()
+        menu_text() #menu detailing the various menu selections. Defined as a function above
+        Menu_selection=input("Please enter one of the above Menu Options [1-5]: ")
+        print()
     
-    if Menu_selection=="1":
-        wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
-        while input_positive_checker(wavelength)!=True:
-            wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
-        k=(2*math.pi)/float(wavelength) #checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken
-        x1=input("Thank you\nPlease insert the starting coordinate of the aperture, x1', in metres:")
-        while input_checker(x1)!=True:
-            x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting coordinate of the aperture in metres:")
-        x1=float(x1)
-        x2=input("Thank you\nPlease insert the ending coordinate of the aperture, x2', in metres:")
-        while input_checker(x2)!=True:
-            x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending coordinate of the aperture in metres:")
-        x2=float(x2)
-        z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
-        while input_positive_checker(z)!=True:
-            z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
-        z=float(z)
-        N=input("Please insert an even interval integer for integration, N:")
-        while N_check(N)!=True:
-            N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
-        N=int(N)
-        xmin=input("Thank you\nPlease insert the desired minimum screen coordinate for the intensity plot, xmin, in metres:")
-        while input_checker(xmin)!=True:
-            xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum screen coordinate in metres:")
-        xmin=float(xmin)
-        xmax=input("Thank you\nPlease insert the desired maximum screen coordinate for the intensity plot, xmax, in metres:")
-        while input_checker(xmax)!=True:
-            xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum screen coordinate in metres:")
-        xmax=float(xmax)
-        NumPoints=200
-        xvals=np.linspace(xmin,xmax,NumPoints) #sets up an array of 200 values from xmin to xmax of the user defined screen limits
-        yvals=np.zeros(NumPoints)
-        for i in range(NumPoints):
-            yvals[i]=Intensity_function_1D(k,xvals[i],z,x1,x2,N) #calculates intensity for each screen coordinate in the array using self built simpsons integration function
-        plt.plot(xvals,yvals)
-        plt.xlabel("Screen coordinate (m)")
-        plt.ylabel("Relative Intensity")
-        plt.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #sets both axes ticks to scientific notation for improved formatting
-        plt.show()
+        if Menu_selection=="1":
+            wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
+            while input_positive_checker(wavelength)!=True:
+                wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
+            k=(2*math.pi)/float(wavelength) #checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken
+            x1=input("Thank you\nPlease insert the starting coordinate of the aperture, x1', in metres:")
+            while input_checker(x1)!=True:
+                x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting coordinate of the aperture in metres:")
+            x1=float(x1)
+            x2=input("Thank you\nPlease insert the ending coordinate of the aperture, x2', in metres:")
+            while input_checker(x2)!=True:
+                x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending coordinate of the aperture in metres:")
+            x2=float(x2)
+            z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
+            while input_positive_checker(z)!=True:
+                z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
+            z=float(z)
+            N=input("Please insert an even interval integer for integration, N:")
+            while N_check(N)!=True:
+                N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
+            N=int(N)
+            xmin=input("Thank you\nPlease insert the desired minimum screen coordinate for the intensity plot, xmin, in metres:")
+            while input_checker(xmin)!=True:
+                xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum screen coordinate in metres:")
+            xmin=float(xmin)
+            xmax=input("Thank you\nPlease insert the desired maximum screen coordinate for the intensity plot, xmax, in metres:")
+            while input_checker(xmax)!=True:
+                xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum screen coordinate in metres:")
+            xmax=float(xmax)
+            NumPoints=200
+            xvals,yvals=Pattern_1D(k,x1,x2,z,N,xmin,xmax,NumPoints) #calculates intensity at 200 screen coordinates from xmin to xmax using the batched self built simpsons integration
+            fig,ax=plt.subplots()
+            Plot_pattern_1D(ax,xvals,yvals)
+            plt.show()
                 
-    elif Menu_selection=="2":
-        wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
-        while input_positive_checker(wavelength)!=True:
-            wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
-        k=(2*math.pi)/float(wavelength) #As before, checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken
-        x1=input("Thank you\nPlease insert the starting x coordinate of the aperture, x1', in metres:")
-        while input_checker(x1)!=True:
-            x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting x coordinate of the aperture in metres:")
-        x1=float(x1)
-        x2=input("Thank you\nPlease insert the ending x coordinate of the aperture, x2', in metres:")
-        while input_checker(x2)!=True:
-            x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending x coordinate of the aperture in metres:")
-        x2=float(x2)
-        y1=input("Thank you\nPlease insert the starting y coordinate of the aperture, y1', in metres:")
-        while input_checker(y1)!=True:
-            y1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting y coordinate of the aperture in metres:")
-        y1=float(y1)
-        y2=input("Thank you\nPlease insert the ending y coordinate of the aperture, y2', in metres:")
-        while input_checker(y2)!=True:
-            y2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending y coordinate of the aperture in metres:")
-        y2=float(y2)
-        z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
-        while input_positive_checker(z)!=True:
-            z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
-        z=float(z)
-        N=input("Please insert an even interval integer for integration, N:")
-        while N_check(N)!=True:
-            N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
-        N=int(N)
-        NumPoints=200
-        xmin=input("Thank you\nPlease insert the desired minimum x screen coordinate for the intensity plot, xmin, in metres:")
-        while input_checker(xmin)!=True:
-            xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum x screen coordinate in metres:")
-        xmin=float(xmin)
-        xmax=input("Thank you\nPlease insert the desired maximum x screen coordinate for the intensity plot, xmax, in metres:")
-        while input_checker(xmax)!=True:
-            xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum x screen coordinate in metres:")
-        xmax=float(xmax)
-        ymin=input("Thank you\nPlease insert the desired minimum y screen coordinate for the intensity plot, ymin, in metres:")
-        while input_checker(ymin)!=True:
-            ymin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum y screen coordinate in metres:")
-        ymin=float(ymin)
-        ymax=input("Thank you\nPlease insert the desired maximum y screen coordinate for the intensity plot, ymax, in metres:")
-        while input_checker(ymax)!=True:
-            ymax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum y screen coordinate in metres:")
-        ymax=float(ymax)
-        xvals=np.linspace(xmin,xmax,100)
-        yvals=np.linspace(ymin,ymax,100) #x screen coordiante, y screen coordinate arrays generated from the user defined screen limits
-        NumPoints=100
-        zvals=np.zeros((NumPoints,NumPoints)) 
-        for i in range(len(xvals)):
-            for j in range(len(yvals)): #for each x coordinate, all the intensity values at every y coordinate calculated. This is then continued cycling through each x coordinate.
-                zvals[i,j]=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Intensity_function_x_2D(k,xvals[i],z,x1,x2,N)*Intensity_function_y_2D(k,yvals[j],z,y1,y2,N)))**2
-        plt.imshow(zvals, extent=[xmin,xmax,ymin,ymax]) #plots image to the extent of the user defined screen limits
-        plt.locator_params(axis="both", nbins=5) #sets both axes to contain only 5 ticks
-        cbar=plt.colorbar()
-        cbar.set_label("Relative Intensity", rotation=270, labelpad=15) #labels colourbar. Label is rotated to vertical and set a suitable distance to the colourbar itself
-        cbar.formatter.set_powerlimits((0, 0)) #Colourbar given scientific notation for improved formatting 
-        cbar.update_ticks()
-        plt.xlabel("x screen coordinate (m)")
-        plt.ylabel("y screen coordinate (m)")
-        plt.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #both axes given scientific notation for improved formatting
-        plt.show()
+        elif Menu_selection=="2":
+            wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
+            while input_positive_checker(wavelength)!=True:
+                wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
+            k=(2*math.pi)/float(wavelength) #As before, checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken
+            x1=input("Thank you\nPlease insert the starting x coordinate of the aperture, x1', in metres:")
+            while input_checker(x1)!=True:
+                x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting x coordinate of the aperture in metres:")
+            x1=float(x1)
+            x2=input("Thank you\nPlease insert the ending x coordinate of the aperture, x2', in metres:")
+            while input_checker(x2)!=True:
+                x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending x coordinate of the aperture in metres:")
+            x2=float(x2)
+            y1=input("Thank you\nPlease insert the starting y coordinate of the aperture, y1', in metres:")
+            while input_checker(y1)!=True:
+                y1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting y coordinate of the aperture in metres:")
+            y1=float(y1)
+            y2=input("Thank you\nPlease insert the ending y coordinate of the aperture, y2', in metres:")
+            while input_checker(y2)!=True:
+                y2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending y coordinate of the aperture in metres:")
+            y2=float(y2)
+            z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
+            while input_positive_checker(z)!=True:
+                z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
+            z=float(z)
+            N=input("Please insert an even interval integer for integration, N:")
+            while N_check(N)!=True:
+                N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
+            N=int(N)
+            NumPoints=200
+            xmin=input("Thank you\nPlease insert the desired minimum x screen coordinate for the intensity plot, xmin, in metres:")
+            while input_checker(xmin)!=True:
+                xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum x screen coordinate in metres:")
+            xmin=float(xmin)
+            xmax=input("Thank you\nPlease insert the desired maximum x screen coordinate for the intensity plot, xmax, in metres:")
+            while input_checker(xmax)!=True:
+                xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum x screen coordinate in metres:")
+            xmax=float(xmax)
+            ymin=input("Thank you\nPlease insert the desired minimum y screen coordinate for the intensity plot, ymin, in metres:")
+            while input_checker(ymin)!=True:
+                ymin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum y screen coordinate in metres:")
+            ymin=float(ymin)
+            ymax=input("Thank you\nPlease insert the desired maximum y screen coordinate for the intensity plot, ymax, in metres:")
+            while input_checker(ymax)!=True:
+                ymax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum y screen coordinate in metres:")
+            ymax=float(ymax)
+            NumPoints=100
+            xvals,yvals,zvals=Pattern_2D(k,x1,x2,y1,y2,z,N,xmin,xmax,ymin,ymax,NumPoints,"simpson") #x and y integrals calculated once per screen coordinate, then combined into the intensity at every coordinate pair
+            fig,ax=plt.subplots()
+            Plot_map_2D(fig,ax,zvals,[xmin,xmax,ymin,ymax])
+            plt.show()
             
-    elif Menu_selection=="3":
-        wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
-        while input_positive_checker(wavelength)!=True:
-            wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
-        k=(2*math.pi)/float(wavelength) #As before, checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken.
-        x1=input("Thank you\nPlease insert the starting x coordinate of the aperture, x1', in metres:")
-        while input_checker(x1)!=True:
-            x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting x coordinate of the aperture in metres:")
-        x1=float(x1)
-        x2=input("Thank you\nPlease insert the ending x coordinate of the aperture, x2', in metres:")
-        while input_checker(x2)!=True:
-            x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending x coordinate of the aperture in metres:")
-        x2=float(x2)
-        y1=input("Thank you\nPlease insert the starting y coordinate of the aperture, y1', in metres:")
-        while input_checker(y1)!=True:
-            y1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting y coordinate of the aperture in metres:")
-        y1=float(y1)
-        y2=input("Thank you\nPlease insert the ending y coordinate of the aperture, y2', in metres:")
-        while input_checker(y2)!=True:
-            y2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending y coordinate of the aperture in metres:")
-        y2=float(y2)
-        z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
-        while input_positive_checker(z)!=True:
-            z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
-        z=float(z)
-        N=input("Please insert an even interval integer for integration, N:")
-        while N_check(N)!=True:
-            N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
-        N=int(N)
-        NumPoints=200
-        xmin=input("Thank you\nPlease insert the desired minimum x screen coordinate for the intensity plot, xmin, in metres:")
-        while input_checker(xmin)!=True:
-            xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum x screen coordinate in metres:")
-        xmin=float(xmin)
-        xmax=input("Thank you\nPlease insert the desired maximum x screen coordinate for the intensity plot, xmax, in metres:")
-        while input_checker(xmax)!=True:
-            xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum x screen coordinate in metres:")
-        xmax=float(xmax)
-        ymin=input("Thank you\nPlease insert the desired minimum y screen coordinate for the intensity plot, ymin, in metres:")
-        while input_checker(ymin)!=True:
-            ymin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum y screen coordinate in metres:")
-        ymin=float(ymin)
-        ymax=input("Thank you\nPlease insert the desired maximum y screen coordinate for the intensity plot, ymax, in metres:")
-        while input_checker(ymax)!=True:
-            ymax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum y screen coordinate in metres:")
-        ymax=float(ymax)
-        xvals=np.linspace(xmin,xmax,100)
-        yvals=np.linspace(ymin,ymax,100) #x screen coordiante, y screen coordinate arrays generated from the user defined screen limits
-        NumPoints=100
-        zvals=np.zeros((NumPoints,NumPoints))
-        for i in range(len(xvals)):
-            for j in range(len(yvals)): #for each x coordinate, all the intensity values at every y coordinate calculated. This is then continued cycling through each x coordinate.
-                zvals[i,j]=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Intensity_function_x_2D_Trapezoid(k,xvals[i],z,x1,x2,N)*Intensity_function_y_2D_Trapezoid(k,yvals[j],z,y1,y2,N)))**2
-        plt.imshow(zvals, extent=[xmin,xmax,ymin,ymax]) #plots image to the extent of the user defined screen limits
-        plt.locator_params(axis="both", nbins=5) #sets both axes to contain only 5 ticks
-        cbar=plt.colorbar()
-        cbar.set_label("Relative Intensity", rotation=270, labelpad=15) #labels colourbar. Label is rotated to vertical and set a suitable distance to the colourbar itself
-        cbar.formatter.set_powerlimits((0, 0)) #Colourbar given scientific notation for improved formatting
-        cbar.update_ticks()
-        plt.xlabel("x screen coordinate (m)")
-        plt.ylabel("y screen coordinate (m)")
-        plt.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #both axes given scientific notation for improved formatting
-        plt.show()
+        elif Menu_selection=="3":
+            wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
+            while input_positive_checker(wavelength)!=True:
+                wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
+            k=(2*math.pi)/float(wavelength) #As before, checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken.
+            x1=input("Thank you\nPlease insert the starting x coordinate of the aperture, x1', in metres:")
+            while input_checker(x1)!=True:
+                x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting x coordinate of the aperture in metres:")
+            x1=float(x1)
+            x2=input("Thank you\nPlease insert the ending x coordinate of the aperture, x2', in metres:")
+            while input_checker(x2)!=True:
+                x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending x coordinate of the aperture in metres:")
+            x2=float(x2)
+            y1=input("Thank you\nPlease insert the starting y coordinate of the aperture, y1', in metres:")
+            while input_checker(y1)!=True:
+                y1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting y coordinate of the aperture in metres:")
+            y1=float(y1)
+            y2=input("Thank you\nPlease insert the ending y coordinate of the aperture, y2', in metres:")
+            while input_checker(y2)!=True:
+                y2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending y coordinate of the aperture in metres:")
+            y2=float(y2)
+            z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
+            while input_positive_checker(z)!=True:
+                z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
+            z=float(z)
+            N=input("Please insert an even interval integer for integration, N:")
+            while N_check(N)!=True:
+                N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
+            N=int(N)
+            NumPoints=200
+            xmin=input("Thank you\nPlease insert the desired minimum x screen coordinate for the intensity plot, xmin, in metres:")
+            while input_checker(xmin)!=True:
+                xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum x screen coordinate in metres:")
+            xmin=float(xmin)
+            xmax=input("Thank you\nPlease insert the desired maximum x screen coordinate for the intensity plot, xmax, in metres:")
+            while input_checker(xmax)!=True:
+                xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum x screen coordinate in metres:")
+            xmax=float(xmax)
+            ymin=input("Thank you\nPlease insert the desired minimum y screen coordinate for the intensity plot, ymin, in metres:")
+            while input_checker(ymin)!=True:
+                ymin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum y screen coordinate in metres:")
+            ymin=float(ymin)
+            ymax=input("Thank you\nPlease insert the desired maximum y screen coordinate for the intensity plot, ymax, in metres:")
+            while input_checker(ymax)!=True:
+                ymax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum y screen coordinate in metres:")
+            ymax=float(ymax)
+            NumPoints=100
+            xvals,yvals,zvals=Pattern_2D(k,x1,x2,y1,y2,z,N,xmin,xmax,ymin,ymax,NumPoints,"trapezoid") #x and y integrals calculated once per screen coordinate, then combined into the intensity at every coordinate pair
+            fig,ax=plt.subplots()
+            Plot_map_2D(fig,ax,zvals,[xmin,xmax,ymin,ymax])
+            plt.show()
         
-    elif Menu_selection=="4":
-        wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
-        while input_positive_checker(wavelength)!=True:
-            wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
-        k=(2*math.pi)/float(wavelength) #As before, checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken.
-        x1=input("Thank you\nPlease insert the starting coordinate of the aperture, x1', in metres:")
-        while input_checker(x1)!=True:
-            x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting coordinate of the aperture in metres:")
-        x1=float(x1)
-        x2=input("Thank you\nPlease insert the ending coordinate of the aperture, x2', in metres:")
-        while input_checker(x2)!=True:
-            x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending coordinate of the aperture in metres:")
-        x2=float(x2)
-        z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
-        while input_positive_checker(z)!=True:
-            z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
-        z=float(z)
-        N=input("Please insert an even interval integer for integration, N:")
-        while N_check(N)!=True:
-            N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
-        N=int(N)
-        NumPoints=200
-        xmin=input("Thank you\nPlease insert the desired minimum screen coordinate for the intensity plot, xmin, in metres:")
-        while input_checker(xmin)!=True:
-            xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum screen coordinate in metres:")
-        xmin=float(xmin)
-        xmax=input("Thank you\nPlease insert the desired maximum screen coordinate for the intensity plot, xmax, in metres:")
-        while input_checker(xmax)!=True:
-            xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum screen coordinate in metres:")
-        xmax=float(xmax)
-        xvals=np.linspace(xmin,xmax,NumPoints) #sets up an array of 200 values from xmin to xmax of the user defined screen limits
-        yvals_simps=np.zeros(NumPoints)
-        yvals_trapz=np.zeros(NumPoints)
-        ydiff=np.zeros(NumPoints) #initiates arrays for simpsons, trapezoid and the difference
-        for i in range(NumPoints):
-            yvals_simps[i]=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Intensity_function_x_2D(k,xvals[i],z,x1,x2,N)))**2 #calculates intensity for each screen coordinate in the array using inbuilt simpsons integration
-            yvals_trapz[i]=8.85E-12*3E8*(abs((k/(2*np.pi*z))*Intensity_function_x_2D_Trapezoid(k,xvals[i],z,x1,x2,N)))**2 #calculates intensity for each screen coordinate in the array using inbuilt trapezoid integration
-            ydiff[i]=abs(yvals_simps[i]-yvals_trapz[i]) #calculates difference between values produced from simpson's and trapezoid integrations
-        plt.plot(xvals,yvals_simps, label="Simpsons")
-        plt.plot(xvals,yvals_trapz, label="Trapezoid")
-        plt.xlabel("Screen coordinate (m)")
-        plt.ylabel("Relative Intensity")
-        plt.legend()
-        plt.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #both axes given scientific notation for improved formatting
-        plt.show()
+        elif Menu_selection=="4":
+            wavelength=input("Welcome\nPlease insert a value for wavelength, λ, in metres:")
+            while input_positive_checker(wavelength)!=True:
+                wavelength=input("I'm sorry, this is not a valid wavelength\nPlease insert a positive wavelength in metres:")
+            k=(2*math.pi)/float(wavelength) #As before, checks user input to ensure positive float inputted, only after this is satisfied will the float of the input be taken.
+            x1=input("Thank you\nPlease insert the starting coordinate of the aperture, x1', in metres:")
+            while input_checker(x1)!=True:
+                x1=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid starting coordinate of the aperture in metres:")
+            x1=float(x1)
+            x2=input("Thank you\nPlease insert the ending coordinate of the aperture, x2', in metres:")
+            while input_checker(x2)!=True:
+                x2=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid ending coordinate of the aperture in metres:")
+            x2=float(x2)
+            z=input("Thank you\nPlease insert the screen distance to the aperture, z, in metres:")
+            while input_positive_checker(z)!=True:
+                z=input("I'm sorry, this is not a valid distance\nPlease insert a valid positive screen distance to the aperture in metres:")
+            z=float(z)
+            N=input("Please insert an even interval integer for integration, N:")
+            while N_check(N)!=True:
+                N=input("I'm sorry, this is not a valid interval\nPlease insert a valid even integer interval for integration:")
+            N=int(N)
+            NumPoints=200
+            xmin=input("Thank you\nPlease insert the desired minimum screen coordinate for the intensity plot, xmin, in metres:")
+            while input_checker(xmin)!=True:
+                xmin=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid minimum screen coordinate in metres:")
+            xmin=float(xmin)
+            xmax=input("Thank you\nPlease insert the desired maximum screen coordinate for the intensity plot, xmax, in metres:")
+            while input_checker(xmax)!=True:
+                xmax=input("I'm sorry, this is not a valid coordinate\nPlease insert a valid maximum screen coordinate in metres:")
+            xmax=float(xmax)
+            xvals,yvals_simps,yvals_trapz,ydiff=Compare_rules_1D(k,x1,x2,z,N,xmin,xmax,NumPoints) #intensities at 200 screen coordinates using inbuilt simpsons and trapezoid integration, and their difference
+            fig,ax=plt.subplots()
+            Plot_pattern_1D(ax,xvals,yvals_simps,"Simpsons")
+            Plot_pattern_1D(ax,xvals,yvals_trapz,"Trapezoid")
+            ax.legend()
+            plt.show()
         
-        plt.plot(xvals, ydiff)
-        plt.xlabel("Screen coordinate (m)")
-        plt.ylabel("Relative Intensity")
-        plt.ticklabel_format(style='sci', axis='both', scilimits=(0,0)) #both axes given scientific notation for improved formatting
-        plt.show()
+            fig,ax=plt.subplots()
+            Plot_pattern_1D(ax,xvals,ydiff)
+            plt.show()
         
-    elif Menu_selection=="5":
-        print("Thank you for using this program")
-        break #ends the menu selection loop which in turn ends the program
+        elif Menu_selection=="5":
+            print("Thank you for using this program")
+            break #ends the menu selection loop which in turn ends the program
     
-    else: #accepts arguments which are not [1-5] so that the menu selection loop is not accidentally broken
-        print("Apologies but I do not recognise this selection")
+        else: #accepts arguments which are not [1-5] so that the menu selection loop is not accidentally broken
+            print("Apologies but I do not recognise this selection")
+
+def main(argv=None):
+    """This function runs the batch command line when a batch file is given, and the interactive menu otherwise"""
+    parser=argparse.ArgumentParser(description="Fresnel diffraction from an aperture")
+    parser.add_argument("--batch",metavar="FILE",help="JSON or CSV file of parameter sets to run without prompts")
+    parser.add_argument("--output-dir",default="results",help="directory for the .npz results of a batch (default: results)")
+    parser.add_argument("--cache-dir",help="directory of a result cache to reuse previously calculated patterns")
+    parser.add_argument("--cache-size",type=float,default=1024,help="size limit of the result cache in MB (default: 1024)")
+    parser.add_argument("--plots",choices=("png","svg"),help="also save an image of every result in this format, without a display")
+    parser.add_argument("--profile",action="store_true",help="print the time, evaluations, allocations and throughput of each stage at the end")
+    parser.add_argument("--profile-log",metavar="FILE",help="also write the stage records to FILE as JSON")
+    args=parser.parse_args(argv)
+    Profiler.enabled=args.profile or args.profile_log is not None
+    if args.batch:
+        cache=Result_cache(args.cache_dir,int(args.cache_size*2**20)) if args.cache_dir else None
+        renderer=None
+        if args.plots:
+            plt.switch_backend("Agg") #non-interactive backend so no display is needed
+            renderer=Batch_renderer(args.output_dir,args.plots)
+        Run_batch(Load_jobs(args.batch),args.output_dir,cache,renderer)
+        if renderer is not None:
+            renderer.close()
+    else:
+        Menu()
+    if Profiler.enabled:
+        print(Profiler.summary())
+        if args.profile_log:
+            Profiler.write_json(args.profile_log)
 
+if __name__=="__main__":
+    main()